@@ -130,16 +130,18 @@ def configure_spawner(c):
         spawner.environment = spawner.environment or {}
         spawner.environment.update(config['env'])
 
+        # The spawner is reused across spawns: drop GPU settings left by an
+        # earlier GPU profile before deciding on this one
+        host_config = dict(spawner.extra_host_config or {})
+        host_config.pop('runtime', None)
+        host_config.pop('device_requests', None)
         if config.get('gpu') and 'gpu' in user_options.get('image', '').lower():
-            spawner.extra_host_config = spawner.extra_host_config or {}
-            spawner.extra_host_config.update({
+            host_config.update({
                 'runtime': 'nvidia',
-                'device_requests': [{
-                    'driver': 'nvidia',
-                    'capabilities': [['gpu']],
-                    'count': 1
-                }]
+                # The device chosen by the discovery service, or any one GPU
+                'device_requests': [spawner.gpu_device_request()]
             })
+        spawner.extra_host_config = host_config
 
         spawner.log.info(f"Spawner configured: CPU={spawner.cpu_limit}, Memory={spawner.mem_limit}, Profile={profile_name}")
 
@@ -1,4 +1,9 @@
 const API_URL = "http://192.168.122.1:15002";
+const NODE_POLL_LIMIT = 50;
+// Base URL of the async app (the discovery-stream service), which serves the
+// /nodes/stream Server-Sent Events without tying up a thread per form.
+// Set it to "" to poll /available-nodes on API_URL instead.
+const NODE_STREAM_URL = "http://192.168.122.1:15003";
 let profiles = [];
 let nodes = [];
 let selectedProfile = null;
@@ -73,10 +78,15 @@ async function loadProfiles() {
 
 async function loadNodes() {
     try {
-        const resp = await fetch(`${API_URL}/available-nodes`);
+        // Compact view, capped list: the poll only needs what the form shows
+        const params = new URLSearchParams({ view: 'compact', limit: NODE_POLL_LIMIT, count: 0 });
+        if (selectedProfile) params.set('profile_id', selectedProfile.id);
+        const resp = await fetch(`${API_URL}/available-nodes?${params}`);
         if (resp.ok) {
             const data = await resp.json();
             nodes = data.all_available_nodes || [];
+            // A capped list may leave out selected nodes that are still available
+            applyNodeUpdates(nodes.length < NODE_POLL_LIMIT);
         }
     } catch (e) {
         console.log('Could not fetch available nodes:', e);
@@ -121,6 +131,16 @@ function renderProfiles() {
     });
 }
 
+// GPU profiles get a specific device from the discovery service
+function gpuLabel(node) {
+    const device = node.gpu_device;
+    if (device) {
+        const free = device.memory_free_mb != null ? `, ${(device.memory_free_mb / 1024).toFixed(1)} GB free` : '';
+        return `${device.name || 'GPU'} #${device.index}${free}`;
+    }
+    return node.gpu_info && node.gpu_info[0] ? node.gpu_info[0].name : 'Available';
+}
+
 function renderNodes(nodesList) {
     const nodeList = document.getElementById('node-list');
     if (!nodeList || !nodesList) return;
@@ -152,7 +172,7 @@ function renderNodes(nodesList) {
                 <div class="node-spec"><strong>Memory:</strong> ${node.ram_gb} GB</div>
                 <div class="node-spec"><strong>Containers:</strong> ${node.total_containers || 0} active</div>
             </div>
-            ${node.has_gpu ? `<div class="gpu-info"><span>GPU: </span><span>${node.gpu_info && node.gpu_info[0] ? node.gpu_info[0].name : 'Available'}</span></div>` : ''}
+            ${node.has_gpu ? `<div class="gpu-info"><span>GPU: </span><span>${gpuLabel(node)}</span></div>` : ''}
             <div class="node-metrics">
                 <div class="metric"><div class="metric-label">CPU Usage</div><div class="metric-bar"><div class="metric-fill ${cpu > 80 ? 'high' : cpu > 60 ? 'medium' : ''}" style="width: ${cpu}%"></div></div><div class="metric-value">${cpu.toFixed(1)}%</div></div>
                 <div class="metric"><div class="metric-label">Memory Usage</div><div class="metric-bar"><div class="metric-fill ${mem > 80 ? 'high' : mem > 60 ? 'medium' : ''}" style="width: ${mem}%"></div></div><div class="metric-value">${mem.toFixed(1)}%</div></div>
@@ -193,6 +213,7 @@ async function selectProfile(profile, event) {
     document.getElementById('image').value = profile.gpu_required ? 'danielcristh0/jupyterlab:gpu' : 'danielcristh0/jupyterlab:cpu';
     
     await displayNodes();
+    startNodeUpdates();
 }
 
 async function displayNodes() {
@@ -205,15 +226,9 @@ async function displayNodes() {
     nodeList.innerHTML = '<div class="loading"><span class="spinner"></span>Selecting best nodes...</div>';
 
     try {
-        const resp = await fetch(`${API_URL}/select-nodes`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                profile_id: selectedProfile.id,
-                num_nodes: numNodes,
-                user_id: 'jupyterhub-user'
-            })
-        });
+        // Read-only preview; the selection is recorded only when the user proceeds
+        const params = new URLSearchParams({ profile_id: selectedProfile.id, num_nodes: numNodes });
+        const resp = await fetch(`${API_URL}/select-nodes/preview?${params}`);
 
         if (!resp.ok) {
             const errorData = await resp.json().catch(() => ({ error: 'Failed to select nodes' }));
@@ -233,6 +248,29 @@ async function displayNodes() {
     }
 }
 
+async function commitSelection() {
+    const resp = await fetch(`${API_URL}/select-nodes`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            profile_id: selectedProfile.id,
+            num_nodes: selectedNodes.length,
+            user_id: 'jupyterhub-user'
+        })
+    });
+
+    if (!resp.ok) {
+        const errorData = await resp.json().catch(() => ({ error: 'Failed to select nodes' }));
+        throw new Error(errorData.error);
+    }
+
+    // The cluster may have moved since the preview; spawn on what was recorded
+    const data = await resp.json();
+    selectedNodes = data.selected_nodes || [];
+    renderNodes(selectedNodes);
+    updateSummary();
+}
+
 function updateSummary() {
     const summaryBox = document.getElementById('selection-summary');
     const summaryContent = document.getElementById('summary-content');
@@ -290,12 +328,20 @@ function setupListeners() {
 
     const nextButton = document.getElementById('next-button');
     if (nextButton) {
-        nextButton.addEventListener('click', function() {
+        nextButton.addEventListener('click', async function() {
             if (!selectedProfile || selectedNodes.length === 0) {
                 alert("Please select a profile and wait for node selection before proceeding.");
                 return;
             }
 
+            // Commit the selection now that the user is spawning
+            try {
+                await commitSelection();
+            } catch (e) {
+                alert(`Node selection failed: ${e.message}`);
+                return;
+            }
+
             const finalConfig = {
                 profile_id: document.getElementById('profile_id').value,
                 profile_name: document.getElementById('profile_name').value,
@@ -312,8 +358,92 @@ function setupListeners() {
     }
 }
 
-setInterval(async function() {
-    if (selectedProfile) {
-        await loadNodes();
+// Live node updates for the selected profile: /nodes/stream pushes changed
+// nodes only; otherwise, or when the stream gives up, poll every 30s
+const LIVE_FIELDS = ['cpu_usage_percent', 'memory_usage_percent', 'total_containers', 'load_score'];
+let nodeStream = null;
+let nodePoller = null;
+let reselectTimer = null;
+
+// Refresh the rendered selection from `nodes`; `complete` says `nodes` holds
+// every available node, so a selected node missing from it is gone
+function applyNodeUpdates(complete) {
+    if (selectedNodes.length === 0) return;
+    const live = new Map(nodes.map(n => [n.hostname, n]));
+    if (complete && selectedNodes.some(n => !live.has(n.hostname))) {
+        scheduleReselect();
+        return;
+    }
+
+    let changed = false;
+    selectedNodes = selectedNodes.map(node => {
+        const update = live.get(node.hostname);
+        if (!update || LIVE_FIELDS.every(f => update[f] === node[f])) return node;
+        changed = true;
+        const merged = { ...node };
+        LIVE_FIELDS.forEach(f => { merged[f] = update[f]; });
+        return merged;
+    });
+    if (changed) {
+        renderNodes(selectedNodes);
+        updateSummary();
+    }
+}
+
+function scheduleReselect() {
+    if (reselectTimer) return;
+    reselectTimer = setTimeout(() => {
+        reselectTimer = null;
+        displayNodes();
+    }, 1000);
+}
+
+function startNodePolling() {
+    if (nodePoller) return;
+    nodePoller = setInterval(async function() {
+        if (selectedProfile) {
+            await loadNodes();
+        }
+    }, 30000);
+}
+
+function startNodeUpdates() {
+    if (!NODE_STREAM_URL || !window.EventSource) {
+        startNodePolling();
+        return;
     }
-}, 30000);
\ No newline at end of file
+
+    // One stream per profile; the browser reconnects by itself and resumes
+    // with Last-Event-ID
+    if (nodeStream) nodeStream.close();
+    const stream = new EventSource(`${NODE_STREAM_URL}/nodes/stream?profile_id=${selectedProfile.id}`);
+    nodeStream = stream;
+    stream.addEventListener('snapshot', (e) => {
+        nodes = JSON.parse(e.data);
+        applyNodeUpdates(true);
+    });
+    stream.addEventListener('node', (e) => {
+        const node = JSON.parse(e.data);
+        const idx = nodes.findIndex(n => n.hostname === node.hostname);
+        if (idx >= 0) nodes[idx] = node; else nodes.push(node);
+        applyNodeUpdates(false);
+    });
+    stream.addEventListener('remove', (e) => {
+        const { hostname } = JSON.parse(e.data);
+        nodes = nodes.filter(n => n.hostname !== hostname);
+        if (selectedNodes.some(n => n.hostname === hostname)) scheduleReselect();
+    });
+    stream.onopen = () => {
+        if (nodePoller) {
+            clearInterval(nodePoller);
+            nodePoller = null;
+        }
+    };
+    // A failed connection stays CONNECTING while the browser retries, so
+    // poll until the stream opens again
+    stream.onerror = () => {
+        if (nodeStream !== stream) return;
+        if (stream.readyState === EventSource.CLOSED) nodeStream = null;
+        startNodePolling();
+    };
+}
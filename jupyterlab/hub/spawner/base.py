@@ -158,6 +158,24 @@ class MultiNodeSpawner(DockerSpawner):
             self.selected_nodes = selected_nodes_raw
         return {'image': user_opts.get('image', 'danielcristh0/jupyterlab:cpu')}
 
+    def gpu_device_request(self):
+        """
+        Docker device request for the GPU of the primary node.
+        Pins the device picked by the discovery service (``gpu_device`` of the
+        selected node) with device_ids; without one, asks for any single GPU.
+        """
+        self._parse_form_data()
+        primary_node = self.selected_nodes[0] if self.selected_nodes else {}
+        device = primary_node.get('gpu_device') or {}
+
+        request = {'driver': 'nvidia', 'capabilities': [['gpu']]}
+        if device.get('index') is not None:
+            request['device_ids'] = [str(device['index'])]
+            self.log.info(f"Pinning GPU {device['index']} ({device.get('name')}) on {primary_node.get('hostname')}")
+        else:
+            request['count'] = 1
+        return request
+
     async def _write_kernelspec_files(self):
         """
         Write kernelspec JSON files to the configured directory for JEG.
@@ -208,7 +226,8 @@ class MultiNodeSpawner(DockerSpawner):
             '--GatewayClient.url=' + self.jupyter_gateway_public_url,
             '--GatewayClient.auth_token=' + self.gateway_auth_token
         ]
-        self.extra_host_config = {'network_mode': 'jupyterhub-network'}
+        # Keep what pre_spawn_hook set (GPU runtime and device requests)
+        self.extra_host_config = {**(self.extra_host_config or {}), 'network_mode': 'jupyterhub-network'}
         _, port = await super().start()
         self.server_ip = str(primary_node['ip']).strip()
         self.server_port = str(port)
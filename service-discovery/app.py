@@ -1,4 +1,5 @@
 from flask import Flask, jsonify
+from flask_compress import Compress
 from flask_cors import CORS
 from flask_migrate import Migrate
 
@@ -12,6 +13,8 @@ from models import db
 from routes.node_routes import node_bp
 from routes.profile_routes import profile_bp
 
+from utils.json_provider import init_json
+
 import logging
 import os
 
@@ -22,8 +25,10 @@ def create_app():
     app = Flask(__name__)
 
     app.config.from_object(Config)
+    init_json(app, Config.JSON_PROVIDER)
 
     CORS(app, origins="*")
+    Compress(app)
     db.init_app(app)
     Migrate(app, db)
 
@@ -34,8 +39,10 @@ def create_app():
     # Health check route
     @app.route("/health-check")
     def health_check():
-        from services.redis_service import RedisService
-        redis_service = RedisService()
+        from redis_client import pool_stats
+        from routes.node_routes import node_service, redis_service
+        from services.metric_writer import metric_writer
+        from services.node_events import node_events
 
         return jsonify({
             "status": "ok",
@@ -44,6 +51,10 @@ def create_app():
                 "postgres": "connected" if db.engine else "disconnected",
                 "redis": "connected" if redis_service.is_connected() else "disconnected"
             },
+            "redis_pool": pool_stats(),
+            "metric_writer": metric_writer.stats(),
+            "cluster_snapshot": node_service.snapshot.stats() if node_service.snapshot else None,
+            "node_stream": node_events.stats(),
             # "config": {
             #     "redis_host": Config.REDIS_HOST,
             #     "redis_port": Config.REDIS_PORT,
@@ -53,9 +64,30 @@ def create_app():
         }), 200
 
 
-    with app.app_context():
+    from routes.node_routes import node_service, redis_service
+
+    # Gunicorn workers start concurrently; one at a time creates the schema
+    # and default profiles
+    with app.app_context(), redis_service.lock('startup', timeout=60):
         db.create_all()
 
+        # create_all does not add columns to existing tables
+        try:
+            db.session.execute(db.text(
+                "ALTER TABLE profiles ADD COLUMN IF NOT EXISTS selection_algorithm VARCHAR(32)"
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error adding profiles.selection_algorithm: {e}")
+
+        # Partitions must exist before the first heartbeat is flushed
+        from services.metrics_maintenance import MetricsMaintenance
+        try:
+            MetricsMaintenance.ensure_partitions()
+        except Exception as e:
+            logger.error(f"Error creating metric partitions: {e}")
+
         # Initialize default profiles
         from services.profile_service import ProfileService
         try:
@@ -64,6 +96,23 @@ def create_app():
         except Exception as e:
             logger.error(f"Error initializing default profiles: {e}")
 
+    # Drop cached profiles when another worker changes them
+    from services.profile_cache import profile_cache
+    profile_cache.init_app(app, redis_service)
+
+    # Keep the in-memory cluster snapshot fresh from Postgres and Redis events
+    if node_service.snapshot is not None:
+        node_service.snapshot.init_app(app)
+
+    # Fan node heartbeats out to /nodes/stream clients
+    from services.node_events import node_events
+    node_events.init_app(app, redis_service)
+
+    # Flush heartbeat history to Postgres in bulk, off the request path
+    if Config.METRICS_WRITE_BEHIND:
+        from services.metric_writer import metric_writer
+        metric_writer.init_app(app)
+
     return app
 
 def run_periodic_tasks(app):
@@ -74,29 +123,50 @@ def run_periodic_tasks(app):
     def cleanup_inactive_nodes():
         with app.app_context():
             from services.node_service import NodeService
-            from services.redis_service import RedisService
+            from routes.node_routes import redis_service
 
-            redis_service = RedisService()
             node_service = NodeService(redis_service)
 
             while True:
-                try:
-                    node_service.mark_nodes_inactive()
-                    logger.info("Cleaned up inactive nodes")
-                except Exception as e:
-                    logger.error(f"Error in cleanup task: {e}")
+                # Every worker runs this loop; only one per interval does the work
+                if redis_service.claim_interval('cleanup', Config.CLEANUP_INTERVAL):
+                    try:
+                        node_service.mark_nodes_inactive()
+                        pruned = redis_service.prune_stale_nodes()
+                        logger.info(f"Cleaned up inactive nodes ({pruned} pruned from heartbeat index)")
+                    except Exception as e:
+                        logger.error(f"Error in cleanup task: {e}")
+
+                time.sleep(Config.CLEANUP_INTERVAL)
+
+    def maintain_metrics():
+        with app.app_context():
+            from services.metrics_maintenance import MetricsMaintenance
+            from routes.node_routes import redis_service
+
+            while True:
+                if redis_service.claim_interval('metrics_maintenance', Config.METRICS_MAINTENANCE_INTERVAL):
+                    try:
+                        MetricsMaintenance.run()
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f"Error in metrics maintenance task: {e}")
 
-                time.sleep(300)
+                time.sleep(Config.METRICS_MAINTENANCE_INTERVAL)
 
     # Start cleanup thread
     cleanup_thread = threading.Thread(target=cleanup_inactive_nodes, daemon=True)
     cleanup_thread.start()
 
+    # Start partition, retention and rollup maintenance thread
+    maintenance_thread = threading.Thread(target=maintain_metrics, daemon=True)
+    maintenance_thread.start()
+
 if __name__ == '__main__':
     app = create_app()
 
     # Start periodic tasks
     run_periodic_tasks(app)
 
-    # Run the application
-    app.run(debug=True, host='0.0.0.0', port=15002)
\ No newline at end of file
+    # Development server only; production runs wsgi:app under gunicorn
+    app.run(debug=Config.DEBUG, host='0.0.0.0', port=Config.API_PORT)
\ No newline at end of file
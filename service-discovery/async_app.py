@@ -0,0 +1,68 @@
+"""
+asyncio variant of the discovery API for spawn storms.
+
+Serves the node endpoints of routes/node_routes.py with the same JSON
+contract (plus /health-check and read-only /profiles for the spawn form)
+on Quart, redis.asyncio and asyncpg, so one process handles many
+concurrent requests while they wait on Redis and Postgres:
+
+    hypercorn async_app:app --bind 0.0.0.0:15002
+
+Schema creation, profile writes and periodic tasks stay with the sync app
+(app.py / wsgi.py), which must run against the same database.
+"""
+from quart import Quart, jsonify
+from quart_cors import cors
+
+from config import Config
+from routes.async_node_routes import async_node_bp, node_service, redis_service
+from services.node_events import node_events
+from utils.json_provider import init_json
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("DiscoveryAPI")
+
+def create_app():
+    app = Quart(__name__)
+
+    app.config.from_object(Config)
+    init_json(app, Config.JSON_PROVIDER)
+
+    app = cors(app, allow_origin="*")
+
+    # Register blueprints
+    app.register_blueprint(async_node_bp, url_prefix='')
+
+    @app.before_serving
+    async def connect():
+        await redis_service.connect()
+        # The fan-out thread uses the sync client's pub/sub pool
+        from services.redis_service import RedisService
+        node_events.init_app(app, RedisService())
+
+    @app.after_serving
+    async def disconnect():
+        await redis_service.close()
+        await node_service.close()
+
+    # Health check route
+    @app.route("/health-check")
+    async def health_check():
+        return jsonify({
+            "status": "ok",
+            "message": "Hello, from [DiscoveryAPI]",
+            "database": {
+                "postgres": "connected" if node_service.engine else "disconnected",
+                "redis": "connected" if await redis_service.is_connected() else "disconnected"
+            },
+        }), 200
+
+    return app
+
+app = create_app()
+
+if __name__ == '__main__':
+    # Development server only; production runs async_app:app under hypercorn
+    app.run(debug=Config.DEBUG, host='0.0.0.0', port=Config.API_PORT)
@@ -0,0 +1,86 @@
+"""
+Benchmark JSON providers and response compression on /node/<hostname>/metrics.
+
+Seeds one node with --hours of metric history at --interval seconds into
+Postgres, then times the raw history endpoint through the Flask test
+client for every provider x Accept-Encoding combination. Point
+POSTGRES_* at a scratch database; the seeded node is removed afterwards.
+
+    POSTGRES_DB=discovery_bench python benchmark/bench_json_metrics.py --hours 24 --interval 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from models import db, Node
+from services.metric_writer import Heartbeat, persist_heartbeats
+from utils.json_provider import PROVIDERS, provider_class
+from utils.scoring import calculate_node_score
+
+from fixtures import fake_node
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--hours", type=int, default=24)
+parser.add_argument("--interval", type=int, default=10, help="Seconds between seeded samples")
+parser.add_argument("--iterations", type=int, default=20)
+parser.add_argument("--encodings", default="identity,gzip,br")
+args = parser.parse_args()
+
+HOSTNAME = fake_node(0)["hostname"]
+
+
+def seed():
+    node = fake_node(0)
+    now = datetime.now()
+    samples = args.hours * 3600 // args.interval
+    heartbeats = [
+        Heartbeat(HOSTNAME, node, calculate_node_score(node), now - timedelta(seconds=i * args.interval))
+        for i in range(samples)
+    ]
+    for start in range(0, len(heartbeats), 5000):
+        persist_heartbeats(heartbeats[start:start + 5000])
+    return samples
+
+
+def cleanup():
+    Node.query.filter_by(hostname=HOSTNAME).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    url = f"/node/{HOSTNAME}/metrics?hours={args.hours}"
+
+    with app.app_context():
+        samples = seed()
+        try:
+            print(f"{samples} metric rows, {args.iterations} iterations")
+            print(f"{'provider':<8} | {'encoding':<8} | {'p50':>9} | {'max':>9} | {'bytes':>10}")
+            for name in PROVIDERS:
+                app.json = provider_class(name)(app)
+                for encoding in args.encodings.split(","):
+                    headers = {"Accept-Encoding": encoding}
+                    client.get(url, headers=headers)  # warm up
+
+                    timings = []
+                    for _ in range(args.iterations):
+                        start = time.perf_counter()
+                        resp = client.get(url, headers=headers)
+                        timings.append((time.perf_counter() - start) * 1000)
+                        assert resp.status_code == 200, f"{url} -> {resp.status_code}"
+
+                    print(f"{name:<8} | {encoding:<8} | {statistics.median(timings):>7.2f}ms | "
+                          f"{max(timings):>7.2f}ms | {len(resp.data):>10}")
+        finally:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Regression benchmark for the node listing endpoints at cluster scale.
+
+Seeds simulated nodes into Postgres and Redis, then times /all-nodes,
+/available-nodes and /cluster-summary through the Flask test client.
+Point POSTGRES_* and REDIS_* at scratch instances; seeded nodes use the
+bench-node- prefix and are removed afterwards. Exits non-zero when any
+endpoint's median latency exceeds --max-p50-ms.
+
+    POSTGRES_DB=discovery_bench python benchmark/bench_node_endpoints.py --nodes 1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from models import db, Node
+from services.metric_writer import Heartbeat, persist_heartbeats
+from routes.node_routes import node_service, redis_service
+from utils.scoring import calculate_node_score
+
+from fixtures import fake_node
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--nodes", type=int, default=1000)
+parser.add_argument("--iterations", type=int, default=20)
+parser.add_argument("--max-p50-ms", type=float, default=250.0)
+parser.add_argument("--endpoints", default="/all-nodes,/available-nodes,/cluster-summary")
+args = parser.parse_args()
+
+
+def seed(count):
+    heartbeats = []
+    for i in range(count):
+        node = fake_node(i)
+        score = calculate_node_score(node)
+        redis_service.set_node_info(node["hostname"], node, load_score=score)
+        heartbeats.append(Heartbeat(node["hostname"], node, score, datetime.now()))
+    persist_heartbeats(heartbeats)
+    if node_service.snapshot is not None:
+        node_service.snapshot.rebuild()
+
+
+def cleanup(count):
+    for i in range(count):
+        redis_service.delete_node(fake_node(i)["hostname"])
+    Node.query.filter(Node.hostname.like("bench-node-%")).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    failed = False
+
+    with app.app_context():
+        seed(args.nodes)
+        try:
+            print(f"{args.nodes} nodes, {args.iterations} iterations")
+            print(f"{'endpoint':<20} | {'p50':>9} | {'max':>9}")
+            for endpoint in args.endpoints.split(","):
+                client.get(endpoint)  # warm up
+
+                samples = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    resp = client.get(endpoint)
+                    samples.append((time.perf_counter() - start) * 1000)
+                    assert resp.status_code == 200, f"{endpoint} -> {resp.status_code}"
+
+                p50 = statistics.median(samples)
+                flag = "" if p50 <= args.max_p50_ms else "  REGRESSION"
+                failed = failed or bool(flag)
+                print(f"{endpoint:<20} | {p50:>7.2f}ms | {max(samples):>7.2f}ms{flag}")
+        finally:
+            cleanup(args.nodes)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
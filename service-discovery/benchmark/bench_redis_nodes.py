@@ -0,0 +1,79 @@
+"""
+Benchmark RedisService.get_all_nodes_data against the previous
+per-key implementation (KEYS + TTL + GET for every node).
+
+Runs against a local Redis and uses a dedicated database index so the
+simulated nodes never mix with real heartbeats.
+
+    python benchmark/bench_redis_nodes.py --port 16379 --password redis@pass
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from redis import Redis
+
+from services.redis_service import RedisService
+
+from fixtures import fake_node
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--host", default=os.getenv("REDIS_HOST", "localhost"))
+parser.add_argument("--port", type=int, default=int(os.getenv("REDIS_PORT", 6379)))
+parser.add_argument("--password", default=os.getenv("REDIS_PASSWORD"))
+parser.add_argument("--db", type=int, default=15, help="Scratch database, flushed before each run")
+parser.add_argument("--sizes", default="10,100,1000")
+parser.add_argument("--iterations", type=int, default=50)
+args = parser.parse_args()
+
+
+def legacy_get_all_nodes_data(client):
+    """Previous implementation: 2N+1 round trips"""
+    nodes = []
+    for key in client.keys("node:*:info"):
+        if client.ttl(key) <= 0:
+            continue
+        nodes.append(json.loads(client.get(key)))
+    return nodes
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    client = Redis(host=args.host, port=args.port, password=args.password,
+                   db=args.db, decode_responses=True)
+    client.ping()
+
+    service = RedisService()
+    service.client = client
+
+    print(f"{'nodes':>6} | {'legacy p50':>11} | {'legacy max':>11} | {'bulk p50':>9} | {'bulk max':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        client.flushdb()
+        for i in range(size):
+            node = fake_node(i)
+            service.set_node_info(node["hostname"], node)
+
+        assert len(service.get_all_nodes_data()) == size
+
+        legacy_p50, legacy_max = measure(lambda: legacy_get_all_nodes_data(client), args.iterations)
+        bulk_p50, bulk_max = measure(service.get_all_nodes_data, args.iterations)
+        print(f"{size:>6} | {legacy_p50:>9.2f}ms | {legacy_max:>9.2f}ms | {bulk_p50:>7.2f}ms | {bulk_max:>7.2f}ms")
+
+    client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
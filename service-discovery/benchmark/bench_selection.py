@@ -0,0 +1,114 @@
+"""
+Simulate spawn bursts against every selection algorithm and report how
+evenly containers land and how long each pick takes.
+
+Spawns arrive in bursts of --burst simultaneous requests. Within a burst
+every request sees the same node view, as the cluster snapshot would;
+with reservations on, each pick is added to the view straight away, as
+the reserve script does. Between bursts a heartbeat folds the new
+containers into each node's CPU and memory usage. No Redis or Postgres
+is needed.
+
+    python benchmark/bench_selection.py --nodes 50 --spawns 400 --burst 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import Config
+from utils.load_balancer import ALGORITHMS, select_nodes_by_algorithm
+from utils.scoring import calculate_node_score
+
+from fixtures import fake_node
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--nodes", type=int, default=50)
+parser.add_argument("--spawns", type=int, default=400)
+parser.add_argument("--burst", type=int, default=20, help="Simultaneous requests sharing one node view")
+parser.add_argument("--container-cpu", type=float, default=2.0, help="CPU %% added per container")
+parser.add_argument("--container-memory", type=float, default=3.0, help="Memory %% added per container")
+parser.add_argument("--algorithms", default=",".join(ALGORITHMS))
+parser.add_argument("--seed", type=int, default=1)
+args = parser.parse_args()
+
+
+def fleet():
+    nodes = []
+    for i in range(args.nodes):
+        node = fake_node(i)
+        # Start below the availability thresholds so every node can take work
+        node["cpu_usage_percent"] = node["cpu_usage_percent"] * 0.5
+        node["memory_usage_percent"] = node["memory_usage_percent"] * 0.5
+        node["load_score"] = calculate_node_score(node)
+        nodes.append(node)
+    return nodes
+
+
+def reserve(node):
+    """What a reservation does to the view: one more container and the load penalty"""
+    node["total_containers"] += 1
+    node["reserved_containers"] = node.get("reserved_containers", 0) + 1
+    node["load_score"] += Config.RESERVATION_LOAD_PENALTY
+
+
+def heartbeat(node, placed):
+    node["total_containers"] += placed
+    node["cpu_usage_percent"] = min(100.0, node["cpu_usage_percent"] + placed * args.container_cpu)
+    node["memory_usage_percent"] = min(100.0, node["memory_usage_percent"] + placed * args.container_memory)
+    node["load_score"] = calculate_node_score(node)
+
+
+def simulate(algorithm, reservations):
+    random.seed(args.seed)
+    nodes = fleet()
+    placed_total = {n["hostname"]: 0 for n in nodes}
+    timings = []
+    counter = 0
+
+    for burst_start in range(0, args.spawns, args.burst):
+        view = [dict(n) for n in nodes]
+        placed = {}
+        for _ in range(min(args.burst, args.spawns - burst_start)):
+            start = time.perf_counter()
+            picked = select_nodes_by_algorithm(view, algorithm, 1, round_robin_start=counter)[0]
+            timings.append((time.perf_counter() - start) * 1e6)
+            counter += 1
+            placed[picked["hostname"]] = placed.get(picked["hostname"], 0) + 1
+            if reservations:
+                reserve(picked)
+
+        for node in nodes:
+            count = placed.get(node["hostname"], 0)
+            heartbeat(node, count)
+            placed_total[node["hostname"]] += count
+
+    containers = list(placed_total.values())
+    mean = statistics.mean(containers)
+    return {
+        "max": max(containers),
+        "stdev": statistics.pstdev(containers),
+        "peak_ratio": max(containers) / mean if mean else 0,
+        "score_stdev": statistics.pstdev(n["load_score"] for n in nodes),
+        "p50_us": statistics.median(timings),
+        "p99_us": sorted(timings)[int(len(timings) * 0.99) - 1],
+    }
+
+
+def main():
+    print(f"{args.nodes} nodes, {args.spawns} spawns in bursts of {args.burst}")
+    print(f"{'algorithm':<17} | {'reserve':<7} | {'max':>4} | {'stdev':>6} | {'max/mean':>8} | "
+          f"{'score sd':>8} | {'p50':>8} | {'p99':>8}")
+    for algorithm in args.algorithms.split(","):
+        for reservations in (False, True):
+            r = simulate(algorithm, reservations)
+            print(f"{algorithm:<17} | {'on' if reservations else 'off':<7} | {r['max']:>4} | {r['stdev']:>6.2f} | "
+                  f"{r['peak_ratio']:>8.2f} | {r['score_stdev']:>8.2f} | {r['p50_us']:>6.1f}us | {r['p99_us']:>6.1f}us")
+
+
+if __name__ == "__main__":
+    main()
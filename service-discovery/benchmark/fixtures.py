@@ -0,0 +1,20 @@
+"""Simulated node heartbeats shared by the benchmarks"""
+
+
+def fake_node(i):
+    return {
+        "hostname": f"bench-node-{i:04d}",
+        "ip": f"10.0.{i // 256}.{i % 256}",
+        "cpu_cores": 16,
+        "ram_gb": 64.0,
+        "has_gpu": i % 4 == 0,
+        "gpu_info": [],
+        "max_containers": 10,
+        "is_active": True,
+        "cpu_usage_percent": (i * 7) % 100,
+        "memory_usage_percent": (i * 13) % 100,
+        "disk_usage_percent": 40.0,
+        "active_jupyterlab": i % 3,
+        "active_ray": 0,
+        "total_containers": i % 5,
+    }
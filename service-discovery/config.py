@@ -7,6 +7,21 @@ class Config:
     # Flask
     SECRET_KEY = os.environ.get('SECRET_KEY', 'secret-service-1111')
     DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
+    API_PORT = int(os.environ.get('API_PORT', 15002))
+
+    # Response encoding (see utils/json_provider.py)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+    # Flask-Compress: gzip/brotli negotiated from Accept-Encoding
+    COMPRESS_ALGORITHM = os.environ.get('COMPRESS_ALGORITHM', 'br,gzip').split(',')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+    COMPRESS_MIMETYPES = ['application/json', 'text/csv', 'application/x-ndjson']
+    # Exports are streamed; leave streamed responses uncompressed and unbuffered
+    COMPRESS_STREAMS = False
+
+    # Periodic tasks (claimed through Redis so one worker runs each interval)
+    CLEANUP_INTERVAL = int(os.environ.get('CLEANUP_INTERVAL', 300))
 
     # Database
     POSTGRES_HOST = os.environ.get('POSTGRES_HOST', 'localhost')
@@ -19,6 +34,13 @@ class Config:
         f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
         f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
     )
+    # Async app (async_app.py): same database through asyncpg
+    ASYNC_DATABASE_URI = (
+        f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
+        f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    )
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 20))
+    ASYNC_DB_MAX_OVERFLOW = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 20))
     SQLALCHEMY_TRACK_MODIFICATIONS = os.environ.get('SQLALCHEMY_TRACK_MODIFICATIONS', 'false').lower() == 'true'
     SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', 'false').lower() == 'true'
 
@@ -27,14 +49,98 @@ class Config:
     REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', 'redis@pass')
     REDIS_EXPIRE_SECONDS = int(os.environ.get('REDIS_EXPIRE_SECONDS', 45))
+    # Shared connection pool (see redis_client.py)
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_POOL_TIMEOUT = float(os.environ.get('REDIS_POOL_TIMEOUT', 5))
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 5))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get('REDIS_SOCKET_CONNECT_TIMEOUT', 2))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+    # Node state layout: 'json' (one blob per node) or 'hash' (per-field hashes)
+    REDIS_NODE_LAYOUT = os.environ.get('REDIS_NODE_LAYOUT', 'json').lower()
+
+    # Metric history write-behind
+    METRICS_WRITE_BEHIND = os.environ.get('METRICS_WRITE_BEHIND', 'true').lower() == 'true'
+    METRICS_BATCH_SIZE = int(os.environ.get('METRICS_BATCH_SIZE', 500))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_QUEUE_MAX = int(os.environ.get('METRICS_QUEUE_MAX', 10000))
+    METRICS_ENQUEUE_TIMEOUT = float(os.environ.get('METRICS_ENQUEUE_TIMEOUT', 0.5))
+
+    # Metric history partitioning, retention and rollups
+    METRICS_PARTITION_INTERVAL = os.environ.get('METRICS_PARTITION_INTERVAL', 'day').lower()
+    METRICS_PARTITIONS_AHEAD = int(os.environ.get('METRICS_PARTITIONS_AHEAD', 3))
+    METRICS_RAW_RETENTION_DAYS = int(os.environ.get('METRICS_RAW_RETENTION_DAYS', 7))
+    # Row-by-row retention for unpartitioned tables and the default partition
+    METRICS_RETENTION_DELETE_BATCH = int(os.environ.get('METRICS_RETENTION_DELETE_BATCH', 5000))
+    METRICS_RETENTION_MAX_BATCHES = int(os.environ.get('METRICS_RETENTION_MAX_BATCHES', 20))
+    METRICS_ROLLUP_RETENTION_DAYS = {
+        '1m': int(os.environ.get('METRICS_ROLLUP_1M_RETENTION_DAYS', 14)),
+        '5m': int(os.environ.get('METRICS_ROLLUP_5M_RETENTION_DAYS', 90)),
+        '1h': int(os.environ.get('METRICS_ROLLUP_1H_RETENTION_DAYS', 730)),
+    }
+    METRICS_ROLLUP_LOOKBACK_SECONDS = int(os.environ.get('METRICS_ROLLUP_LOOKBACK_SECONDS', 300))
+    # Backfills (first run, or after downtime) are rolled up this many hours per transaction
+    METRICS_ROLLUP_BACKFILL_CHUNK_HOURS = int(os.environ.get('METRICS_ROLLUP_BACKFILL_CHUNK_HOURS', 6))
+    METRICS_MAINTENANCE_INTERVAL = int(os.environ.get('METRICS_MAINTENANCE_INTERVAL', 60))
+
+    # In-memory cluster snapshot served to read endpoints
+    CLUSTER_SNAPSHOT_ENABLED = os.environ.get('CLUSTER_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    CLUSTER_SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get('CLUSTER_SNAPSHOT_REFRESH_INTERVAL', 15))
+    CLUSTER_SNAPSHOT_MAX_STALENESS = float(os.environ.get('CLUSTER_SNAPSHOT_MAX_STALENESS', 45))
+
+    # /nodes/stream (Server-Sent Events)
+    NODE_STREAM_BUFFER = int(os.environ.get('NODE_STREAM_BUFFER', 2000))
+    NODE_STREAM_QUEUE_MAX = int(os.environ.get('NODE_STREAM_QUEUE_MAX', 500))
+    NODE_STREAM_KEEPALIVE = float(os.environ.get('NODE_STREAM_KEEPALIVE', 15))
+    NODE_STREAM_RETRY_MS = int(os.environ.get('NODE_STREAM_RETRY_MS', 3000))
+    # Each open stream holds a gthread worker thread on the sync app
+    NODE_STREAM_SYNC_ENABLED = os.environ.get('NODE_STREAM_SYNC_ENABLED', 'false').lower() == 'true'
+
+    # Capacity reservations taken by /select-nodes: each one counts as a
+    # container and adds RESERVATION_LOAD_PENALTY to the node's load score
+    # until a heartbeat reports the container or RESERVATION_TTL passes
+    RESERVATION_TTL = float(os.environ.get('RESERVATION_TTL', 90))
+    RESERVATION_LOAD_PENALTY = float(os.environ.get('RESERVATION_LOAD_PENALTY', 10))
+    # Best-ranked available nodes offered to the reservation script
+    RESERVATION_CANDIDATES = int(os.environ.get('RESERVATION_CANDIDATES', 50))
+
+    # Browser cache lifetime of /select-nodes/preview responses
+    SELECTION_PREVIEW_MAX_AGE = int(os.environ.get('SELECTION_PREVIEW_MAX_AGE', 5))
+
+    # Profile cache (invalidated explicitly on changes, TTL as a safety net)
+    PROFILE_CACHE_TTL = float(os.environ.get('PROFILE_CACHE_TTL', 300))
 
     # Load Balancer Settings
+    # /select-nodes algorithm for profiles without a selection_algorithm
+    SELECTION_ALGORITHM = os.environ.get('SELECTION_ALGORITHM', 'best_fit')
+    # Round-robin position shared by all workers through Redis
+    ROUND_ROBIN_COUNTER_KEY = 'lb:round_robin'
+
+    # bin_pack / bin_spread (see utils/bin_packing.py): demand assumed when a
+    # profile sets no cpu_requirement / ram_requirement, and the weight of
+    # the fragmentation term in placement scores
+    BIN_PACKING_DEFAULT_CORES = float(os.environ.get('BIN_PACKING_DEFAULT_CORES', 1))
+    BIN_PACKING_DEFAULT_RAM_GB = float(os.environ.get('BIN_PACKING_DEFAULT_RAM_GB', 1))
+    BIN_PACKING_FRAGMENTATION_WEIGHT = float(os.environ.get('BIN_PACKING_FRAGMENTATION_WEIGHT', 0.5))
+
+    # GPU placement (see utils/gpu.py): device score weights, the free memory
+    # a device needs to be offered, and how much the best device's score
+    # adds to a node's load score for GPU profiles
+    GPU_MEMORY_WEIGHT = float(os.environ.get('GPU_MEMORY_WEIGHT', 0.5))
+    GPU_UTILIZATION_WEIGHT = float(os.environ.get('GPU_UTILIZATION_WEIGHT', 0.5))
+    GPU_MIN_FREE_MEMORY_MB = float(os.environ.get('GPU_MIN_FREE_MEMORY_MB', 1024))
+    GPU_SCORE_WEIGHT = float(os.environ.get('GPU_SCORE_WEIGHT', 1.0))
+
     DEFAULT_MAX_CPU_USAGE = 80.0
     DEFAULT_MAX_MEMORY_USAGE = 85.0
     STRICT_MAX_CPU_USAGE = 60.0
     STRICT_MAX_MEMORY_USAGE = 60.0
     STRICT_MAX_CONTAINERS = 5
 
+    # Moving averages of CPU, memory and containers kept on every heartbeat;
+    # SCORE_USE_EWMA scores nodes on them instead of the latest sample
+    EWMA_HALF_LIFE_SECONDS = float(os.environ.get('EWMA_HALF_LIFE_SECONDS', 60))
+    SCORE_USE_EWMA = os.environ.get('SCORE_USE_EWMA', 'true').lower() == 'true'
+
     # Scoring weights
     CPU_WEIGHT = 0.8
     MEMORY_WEIGHT = 0.8
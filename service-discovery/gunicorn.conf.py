@@ -0,0 +1,26 @@
+"""Gunicorn settings for the discovery API (see wsgi.py)"""
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('API_HOST', '0.0.0.0')}:{os.environ.get('API_PORT', 15002)}"
+
+# Requests are mostly short Redis/Postgres round trips, so a few processes
+# with several threads each keep the in-process snapshot and caches warm
+worker_class = "gthread"
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Background threads and connection pools must be created after the fork
+preload_app = False
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -6,6 +6,6 @@ db = SQLAlchemy()
 # Import all models
 from .node import Node
 from .profile import Profile
-from .node_selection import NodeSelection, NodeMetric
+from .node_selection import NodeSelection, NodeMetric, NodeMetricRollup, NodeMetricRollupWatermark
 
-__all__ = ['db', 'Node', 'Profile', 'NodeSelection', 'NodeMetric']
\ No newline at end of file
+__all__ = ['db', 'Node', 'Profile', 'NodeSelection', 'NodeMetric', 'NodeMetricRollup', 'NodeMetricRollupWatermark']
\ No newline at end of file
@@ -32,6 +32,16 @@ class Node(db.Model):
     _active_ray = 0
     _total_containers = 0
 
+    # Redis fields consumed by update_current_metrics
+    REDIS_METRIC_FIELDS = (
+        'cpu_usage_percent',
+        'memory_usage_percent',
+        'disk_usage_percent',
+        'active_jupyterlab',
+        'active_ray',
+        'total_containers',
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -49,8 +59,8 @@ class Node(db.Model):
             'active_jupyterlab': self._active_jupyterlab,
             'active_ray': self._active_ray,
             'total_containers': self._total_containers,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
     def update_current_metrics(self, metrics_dict):
@@ -25,14 +25,20 @@ class NodeSelection(db.Model):
             'session_id': self.session_id,
             'selected_nodes': self.selected_nodes,
             'selection_reason': self.selection_reason,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 
 class NodeMetric(db.Model):
+    """Raw heartbeat history, range-partitioned by recorded_at (see metrics_maintenance)"""
     __tablename__ = 'node_metrics'
+    __table_args__ = (
+        db.Index('ix_node_metrics_node_recorded', 'node_id', 'recorded_at'),
+        {'postgresql_partition_by': 'RANGE (recorded_at)'},
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    # The partition key must be part of the primary key
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     node_id = db.Column(db.Integer, db.ForeignKey('nodes.id', ondelete='CASCADE'))
     cpu_usage_percent = db.Column(db.Float)
     memory_usage_percent = db.Column(db.Float)
@@ -41,7 +47,7 @@ class NodeMetric(db.Model):
     active_ray = db.Column(db.Integer, default=0)
     total_containers = db.Column(db.Integer, default=0)
     load_score = db.Column(db.Float)
-    recorded_at = db.Column(db.DateTime, default=datetime.now, index=True)
+    recorded_at = db.Column(db.DateTime, primary_key=True, default=datetime.now)
 
     # Relationships
     node = db.relationship('Node', back_populates='metrics')
@@ -58,5 +64,56 @@ class NodeMetric(db.Model):
             'active_ray': self.active_ray,
             'total_containers': self.total_containers,
             'load_score': self.load_score,
-            'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None
-        }
\ No newline at end of file
+            'recorded_at': self.recorded_at
+        }
+
+
+class NodeMetricRollup(db.Model):
+    """Pre-aggregated node_metrics buckets at 1m, 5m and 1h resolution"""
+    __tablename__ = 'node_metric_rollups'
+
+    # Columns aggregated into <metric>_avg / <metric>_max pairs
+    METRICS = (
+        'cpu_usage_percent',
+        'memory_usage_percent',
+        'disk_usage_percent',
+        'total_containers',
+        'load_score',
+    )
+
+    node_id = db.Column(db.Integer, db.ForeignKey('nodes.id', ondelete='CASCADE'), primary_key=True)
+    resolution = db.Column(db.String(8), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+
+    cpu_usage_percent_avg = db.Column(db.Float)
+    cpu_usage_percent_max = db.Column(db.Float)
+    memory_usage_percent_avg = db.Column(db.Float)
+    memory_usage_percent_max = db.Column(db.Float)
+    disk_usage_percent_avg = db.Column(db.Float)
+    disk_usage_percent_max = db.Column(db.Float)
+    total_containers_avg = db.Column(db.Float)
+    total_containers_max = db.Column(db.Float)
+    load_score_avg = db.Column(db.Float)
+    load_score_max = db.Column(db.Float)
+
+    def to_dict(self):
+        data = {
+            'node_id': self.node_id,
+            'resolution': self.resolution,
+            'bucket_start': self.bucket_start,
+            'samples': self.samples,
+        }
+        for metric in self.METRICS:
+            data[f'{metric}_avg'] = getattr(self, f'{metric}_avg')
+            data[f'{metric}_max'] = getattr(self, f'{metric}_max')
+        return data
+
+
+class NodeMetricRollupWatermark(db.Model):
+    """How far each rollup resolution is complete: every bucket starting
+    before ``rolled_up_to`` has been computed from its source"""
+    __tablename__ = 'node_metric_rollup_watermarks'
+
+    resolution = db.Column(db.String(8), primary_key=True)
+    rolled_up_to = db.Column(db.DateTime, nullable=False)
@@ -15,6 +15,8 @@ class Profile(db.Model):
     max_cpu_usage = db.Column(db.Float, default=80.0)
     max_memory_usage = db.Column(db.Float, default=85.0)
     priority = db.Column(db.Integer, default=0)
+    # Node selection algorithm (utils/load_balancer.ALGORITHMS); NULL uses the default
+    selection_algorithm = db.Column(db.String(32))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
 
@@ -34,8 +36,9 @@ class Profile(db.Model):
             'max_cpu_usage': self.max_cpu_usage,
             'max_memory_usage': self.max_memory_usage,
             'priority': self.priority,
+            'selection_algorithm': self.selection_algorithm,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
     def matches_node(self, node):
@@ -1,19 +1,78 @@
-from redis import Redis, ConnectionPool
-from dotenv import load_dotenv
-import os
+"""Process-wide Redis connection pool registry.
 
-load_dotenv()
+Every RedisService, background thread and script in a worker process
+borrows connections from the same named pools instead of opening its own.
+"""
+import threading
+from typing import Dict
 
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
-REDIS_EXPIRE_SECONDS = int(os.getenv("REDIS_EXPIRE_SECONDS", 45))
+from redis import BlockingConnectionPool, Redis
 
-pool = ConnectionPool(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    password=REDIS_PASSWORD,
-    decode_responses=True
-)
+from config import Config
 
-redis_client = Redis(connection_pool=pool)
+_pools: Dict[str, BlockingConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str = "default") -> BlockingConnectionPool:
+    """Return the shared pool registered under ``name``, creating it on first use"""
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = BlockingConnectionPool(**_pool_kwargs())
+        return _pools[name]
+
+
+def _pool_kwargs() -> Dict:
+    return dict(
+        host=Config.REDIS_HOST,
+        port=Config.REDIS_PORT,
+        password=Config.REDIS_PASSWORD,
+        decode_responses=True,
+        max_connections=Config.REDIS_MAX_CONNECTIONS,
+        timeout=Config.REDIS_POOL_TIMEOUT,
+        socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=Config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+        retry_on_timeout=True,
+    )
+
+
+def create_async_client():
+    """asyncio client on its own pool with the same settings, for the async app.
+
+    Not registered: asyncio connections belong to one event loop, so the
+    caller creates it on startup and closes it on shutdown.
+    """
+    from redis import asyncio as aioredis
+    return aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(**_pool_kwargs()))
+
+
+def get_client(name: str = "default") -> Redis:
+    """Return a client bound to a shared pool (clients are cheap, pools are not)"""
+    return Redis(connection_pool=get_pool(name))
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Utilisation of every registered pool, for sizing max connections under load"""
+    stats = {}
+    for name, pool in list(_pools.items()):
+        # BlockingConnectionPool keeps every created connection in _connections
+        # and parks idle ones (plus None placeholders) in its queue.
+        created = len(pool._connections)
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        in_use = created - idle
+        stats[name] = {
+            "max_connections": pool.max_connections,
+            "created": created,
+            "idle": idle,
+            "in_use": in_use,
+            "utilisation": round(in_use / pool.max_connections, 3) if pool.max_connections else 0,
+        }
+    return stats
+
+
+redis_client = get_client()
@@ -0,0 +1,316 @@
+import asyncio
+import csv
+import io
+from quart import Blueprint, Response, current_app, jsonify, request
+from services.async_node_service import AsyncNodeService, create_engine
+from services.async_redis_service import AsyncRedisService
+from services.node_events import StreamFilter, node_events, parse_last_event_id, snapshot_event
+from services.node_service import filter_available_nodes
+from services.profile_index import profile_criteria
+from config import Config
+from routes.common import STREAM_HEADERS, EXPORT_FIELDS, downsampled_response, parse_export_window, parse_step, selection_etag, summarize_cluster
+from utils.payload import available_nodes_payload, parse_node_view
+from utils.bin_packing import demand_for_profile
+from utils.load_balancer import resolve_algorithm, select_nodes_by_algorithm
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint; same endpoints and JSON contract as routes/node_routes.py
+async_node_bp = Blueprint('async_nodes', __name__)
+
+# Initialize services (async_app.py connects Redis once the loop is running)
+redis_service = AsyncRedisService()
+node_service = AsyncNodeService(redis_service, create_engine())
+
+@async_node_bp.route("/register-node", methods=["POST"])
+async def register_node():
+    """Register or update a node"""
+    data = await request.get_json()
+    success, message = await node_service.register_node(data)
+
+    if success:
+        return jsonify({"status": "ok", "message": message}), 200
+    else:
+        return jsonify({"error": message}), 400
+
+@async_node_bp.route("/all-nodes")
+async def all_nodes():
+    """Get all registered nodes"""
+    nodes = await node_service.get_all_nodes(include_inactive=True)
+    return jsonify({
+        "total_nodes": len(nodes),
+        "nodes": nodes
+    })
+
+@async_node_bp.route("/available-nodes")
+async def available_nodes():
+    """Get available nodes with load balancing info.
+
+    fields=a,b,c or view=compact trim each node, include_all=false drops
+    all_available_nodes and limit=N caps it.
+    """
+    try:
+        # Get filter parameters
+        profile_id = request.args.get('profile_id', type=int)
+        count = request.args.get('count', 1, type=int)
+        try:
+            view = parse_node_view(request.args)
+            # Explicit algorithm=, else the profile's, else round robin
+            profile = await node_service.get_profile(profile_id) if profile_id else None
+            algorithm = resolve_algorithm(request.args.get('algorithm'), profile, 'round_robin')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Get available nodes
+        nodes = await node_service.get_available_nodes(profile_id=profile_id)
+
+        # Reserve round-robin positions here so the selection itself does no I/O
+        start = None
+        take = min(count, len(nodes))
+        if algorithm == 'round_robin' and take > 0:
+            start = await redis_service.advance_round_robin(take)
+        selected = select_nodes_by_algorithm(
+            nodes, algorithm, count, round_robin_start=start, demand=demand_for_profile(profile)
+        )
+
+        return jsonify(available_nodes_payload(nodes, selected, view, {
+            "algorithm": algorithm,
+            "round_robin_counter": await redis_service.get_round_robin_counter(),
+            "requested_count": count,
+            "selected_count": len(selected)
+        }))
+    except Exception as e:
+        logger.error(f"Error in available_nodes: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@async_node_bp.route("/node/<hostname>")
+async def get_node_by_hostname(hostname):
+    """Get specific node by hostname"""
+    node = await node_service.get_node_by_hostname(hostname)
+    if node:
+        return jsonify(node)
+    else:
+        return jsonify({"error": f"Node '{hostname}' not found"}), 404
+
+@async_node_bp.route("/node/<hostname>/metrics")
+async def get_node_metrics(hostname):
+    """Get historical metrics for a node, raw or downsampled with step= and agg="""
+    hours = request.args.get('hours', 24, type=int)
+    step = request.args.get('step')
+
+    if step:
+        agg = request.args.get('agg', 'avg').lower()
+        try:
+            step_seconds = parse_step(step)
+            series = await node_service.get_node_metrics_downsampled(hostname, hours, step_seconds, agg)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if series is None:
+            return jsonify({"error": f"Node '{hostname}' not found"}), 404
+
+        return jsonify(downsampled_response(hostname, hours, step_seconds, agg, series))
+
+    metrics = await node_service.get_node_metrics_history(hostname, hours)
+
+    return jsonify({
+        "hostname": hostname,
+        "hours": hours,
+        "metrics_count": len(metrics),
+        "metrics": metrics
+    })
+
+@async_node_bp.route("/metrics/export")
+async def export_metrics():
+    """Stream NodeMetric rows as NDJSON (default) or CSV"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+
+    try:
+        since, until = parse_export_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid timestamp: {e}"}), 400
+
+    rows = node_service.iter_metrics_export(
+        since, until,
+        hostname=request.args.get('hostname'),
+        page_size=request.args.get('page_size', 5000, type=int)
+    )
+
+    dumps = current_app.json.dumps
+
+    async def generate_ndjson():
+        async for row in rows:
+            yield dumps(row) + "\n"
+
+    async def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        async for row in rows:
+            row["recorded_at"] = row["recorded_at"].isoformat()
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if fmt == 'csv':
+        return Response(generate_csv(), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=node_metrics.csv"})
+    return Response(generate_ndjson(), mimetype="application/x-ndjson")
+
+@async_node_bp.route("/select-nodes/preview")
+async def preview_select_nodes():
+    """Nodes /select-nodes would pick now, without recording a selection.
+
+    Read-only, so the spawn form can call it on every profile click; the
+    response is briefly cacheable and revalidates with If-None-Match.
+    """
+    profile_id = request.args.get('profile_id', type=int)
+    num_nodes = request.args.get('num_nodes', type=int)
+    algorithm = request.args.get('algorithm')
+    if not profile_id:
+        return jsonify({"error": "profile_id is required"}), 400
+
+    try:
+        selected = await node_service.preview_nodes_for_profile(
+            profile_id=profile_id, num_nodes=num_nodes, algorithm=algorithm
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error previewing node selection: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+    etag = selection_etag(selected)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"private, max-age={Config.SELECTION_PREVIEW_MAX_AGE}"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    return jsonify({
+        "status": "ok",
+        "preview": True,
+        "selected_nodes": selected,
+        "count": len(selected)
+    }), 200, headers
+
+@async_node_bp.route("/select-nodes", methods=["POST"])
+async def select_nodes():
+    """Select nodes based on requirements.
+
+    ``algorithm`` (best_fit, round_robin, random, power_of_two or
+    least_connection) overrides the profile's selection_algorithm.
+    """
+    data = await request.get_json()
+
+    try:
+        # Get parameters
+        profile_id = data.get('profile_id')
+        num_nodes = data.get('num_nodes', 1)
+        user_id = data.get('user_id')
+        algorithm = data.get('algorithm')
+
+        if not profile_id:
+            return jsonify({"error": "profile_id is required"}), 400
+
+        # Select nodes
+        selected = await node_service.select_nodes_for_profile(
+            profile_id=profile_id,
+            num_nodes=num_nodes,
+            user_id=user_id,
+            algorithm=algorithm
+        )
+
+        return jsonify({
+            "status": "ok",
+            "selected_nodes": selected,
+            "count": len(selected)
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error selecting nodes: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+@async_node_bp.route("/nodes/stream")
+async def stream_nodes():
+    """Server-Sent Events: a snapshot, then every node whose state changed.
+
+    profile_id= limits the stream to that profile's available nodes.
+    """
+    stream_filter = None
+    profile_id = request.args.get('profile_id', type=int)
+    if profile_id:
+        profile = await node_service.get_profile(profile_id)
+        if profile is None:
+            return jsonify({"error": f"Profile {profile_id} not found"}), 404
+        criteria = profile_criteria(profile)
+        stream_filter = StreamFilter(lambda n: bool(filter_available_nodes([n], criteria)))
+
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    )
+    subscription, backlog = node_events.subscribe(last_event_id, loop=asyncio.get_running_loop())
+    if backlog is None:
+        nodes = await node_service.get_all_nodes()
+        if stream_filter is not None:
+            backlog = [stream_filter.snapshot(nodes, node_events.last_seq)]
+        else:
+            backlog = [snapshot_event(nodes, node_events.last_seq)]
+
+    async def generate():
+        try:
+            yield f"retry: {Config.NODE_STREAM_RETRY_MS}\n\n"
+            for event in backlog:
+                if stream_filter is not None:
+                    event = stream_filter.apply(event)
+                if event is not None:
+                    yield event.encode()
+            while not subscription.closed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), Config.NODE_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if stream_filter is not None:
+                    event = stream_filter.apply(event)
+                if event is not None:
+                    yield event.encode()
+        finally:
+            node_events.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype="text/event-stream", headers=STREAM_HEADERS)
+    # Streams stay open indefinitely
+    response.timeout = None
+    return response
+
+@async_node_bp.route("/cluster-summary")
+async def cluster_summary():
+    """Get cluster summary statistics"""
+    nodes = await node_service.get_all_nodes()
+    return jsonify(summarize_cluster(nodes))
+
+# Read-only profile endpoints used by the spawn form; profile writes stay
+# on the sync app
+
+@async_node_bp.route("/profiles", methods=["GET"])
+async def get_profiles():
+    """Get all profiles"""
+    active_only = request.args.get('active_only', 'true').lower() == 'true'
+    profiles = await node_service.get_profiles(active_only=active_only)
+    return jsonify({
+        "total": len(profiles),
+        "profiles": profiles
+    })
+
+@async_node_bp.route("/profiles/<int:profile_id>", methods=["GET"])
+async def get_profile(profile_id):
+    """Get a specific profile"""
+    profile = await node_service.get_profile(profile_id)
+    if profile:
+        return jsonify(profile)
+    else:
+        return jsonify({"error": "Profile not found"}), 404
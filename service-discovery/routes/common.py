@@ -0,0 +1,70 @@
+"""Request parsing and payload helpers shared by the sync and async node routes"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+EXPORT_FIELDS = [
+    "node_id", "hostname", "recorded_at", "id",
+    "cpu_usage_percent", "memory_usage_percent", "disk_usage_percent",
+    "active_jupyterlab", "active_ray", "total_containers", "load_score",
+]
+
+# Keep proxies from buffering or caching event streams
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def selection_etag(selected: List[Dict]) -> str:
+    """ETag of a selection preview: changes when the picked nodes, their load or GPU do"""
+    key = "|".join(
+        f"{n.get('hostname')}:{n.get('load_score')}:{n.get('total_containers')}:{(n.get('gpu_device') or {}).get('index')}"
+        for n in selected
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def parse_step(value: str) -> int:
+    """Parse a bucket width such as '300', '30s', '5m' or '1h' into seconds"""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+    return int(value)
+
+def parse_export_window(args) -> Tuple[datetime, datetime]:
+    """(since, until) of a /metrics/export request; raises ValueError on bad timestamps"""
+    until = datetime.fromisoformat(args['until']) if 'until' in args else datetime.now()
+    if 'since' in args:
+        since = datetime.fromisoformat(args['since'])
+    else:
+        since = until - timedelta(hours=args.get('hours', 24, type=int))
+    return since, until
+
+def downsampled_response(hostname: str, hours: int, step: int, agg: str, series: Dict) -> Dict:
+    return {
+        "hostname": hostname,
+        "hours": hours,
+        "step": step,
+        "agg": agg,
+        "source": series["source"],
+        "points": len(series["timestamps"]),
+        "timestamps": series["timestamps"],
+        "series": series["series"]
+    }
+
+def summarize_cluster(nodes: List[Dict]) -> Dict:
+    """Container totals and average usage across ``nodes``"""
+    total_containers = {
+        "jupyterlab": sum(n.get("active_jupyterlab", 0) for n in nodes),
+        "ray": sum(n.get("active_ray", 0) for n in nodes),
+        "total": sum(n.get("total_containers", 0) for n in nodes),
+    }
+
+    resource_usage = {
+        "avg_cpu": round(sum(n.get("cpu_usage_percent", 0) for n in nodes) / len(nodes), 2) if nodes else 0,
+        "avg_memory": round(sum(n.get("memory_usage_percent", 0) for n in nodes) / len(nodes), 2) if nodes else 0,
+    }
+
+    return {
+        "total_nodes": len(nodes),
+        "active_nodes": len([n for n in nodes if n.get("is_active")]),
+        "total_containers": total_containers,
+        "resource_usage": resource_usage
+    }
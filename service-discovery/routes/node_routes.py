@@ -1,7 +1,17 @@
-from flask import Blueprint, jsonify, request
-from services.node_service import NodeService
+import csv
+import io
+import queue
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from services.node_service import NodeService, filter_available_nodes
+from services.node_events import StreamFilter, node_events, parse_last_event_id, snapshot_event
+from services.profile_index import profile_index
+from services.profile_cache import profile_cache
 from services.redis_service import RedisService
-from utils.load_balancer import get_round_robin_counter, select_nodes_by_algorithm
+from config import Config
+from routes.common import STREAM_HEADERS, EXPORT_FIELDS, downsampled_response, parse_export_window, parse_step, selection_etag, summarize_cluster
+from utils.payload import available_nodes_payload, parse_node_view
+from utils.bin_packing import demand_for_profile
+from utils.load_balancer import get_round_robin_counter, resolve_algorithm, select_nodes_by_algorithm
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,30 +45,35 @@ def all_nodes():
 
 @node_bp.route("/available-nodes")
 def available_nodes():
-    """Get available nodes with load balancing info"""
+    """Get available nodes with load balancing info.
+
+    fields=a,b,c or view=compact trim each node, include_all=false drops
+    all_available_nodes and limit=N caps it.
+    """
     try:
         # Get filter parameters
         profile_id = request.args.get('profile_id', type=int)
-        algorithm = request.args.get('algorithm', 'round_robin')
         count = request.args.get('count', 1, type=int)
+        try:
+            view = parse_node_view(request.args)
+            # Explicit algorithm=, else the profile's, else round robin
+            profile = profile_cache.get(profile_id) if profile_id else None
+            algorithm = resolve_algorithm(request.args.get('algorithm'), profile, 'round_robin')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         # Get available nodes
         nodes = node_service.get_available_nodes(profile_id=profile_id)
 
         # Select nodes based on algorithm
-        selected = select_nodes_by_algorithm(nodes, algorithm, count)
+        selected = select_nodes_by_algorithm(nodes, algorithm, count, demand=demand_for_profile(profile))
 
-        return jsonify({
-            "total_available_nodes": len(nodes),
-            "selected_nodes": selected,
-            "all_available_nodes": nodes,
-            "load_balancing": {
-                "algorithm": algorithm,
-                "round_robin_counter": get_round_robin_counter(),
-                "requested_count": count,
-                "selected_count": len(selected)
-            }
-        })
+        return jsonify(available_nodes_payload(nodes, selected, view, {
+            "algorithm": algorithm,
+            "round_robin_counter": get_round_robin_counter(),
+            "requested_count": count,
+            "selected_count": len(selected)
+        }))
     except Exception as e:
         logger.error(f"Error in available_nodes: {e}")
         return jsonify({"error": str(e)}), 500
@@ -74,8 +89,23 @@ def get_node_by_hostname(hostname):
 
 @node_bp.route("/node/<hostname>/metrics")
 def get_node_metrics(hostname):
-    """Get historical metrics for a node"""
+    """Get historical metrics for a node, raw or downsampled with step= and agg="""
     hours = request.args.get('hours', 24, type=int)
+    step = request.args.get('step')
+
+    if step:
+        agg = request.args.get('agg', 'avg').lower()
+        try:
+            step_seconds = parse_step(step)
+            series = node_service.get_node_metrics_downsampled(hostname, hours, step_seconds, agg)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if series is None:
+            return jsonify({"error": f"Node '{hostname}' not found"}), 404
+
+        return jsonify(downsampled_response(hostname, hours, step_seconds, agg, series))
+
     metrics = node_service.get_node_metrics_history(hostname, hours)
 
     return jsonify({
@@ -85,9 +115,88 @@ def get_node_metrics(hostname):
         "metrics": metrics
     })
 
+@node_bp.route("/metrics/export")
+def export_metrics():
+    """Stream NodeMetric rows as NDJSON (default) or CSV"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+
+    try:
+        since, until = parse_export_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid timestamp: {e}"}), 400
+
+    rows = node_service.iter_metrics_export(
+        since, until,
+        hostname=request.args.get('hostname'),
+        page_size=request.args.get('page_size', 5000, type=int)
+    )
+
+    def generate_ndjson():
+        dumps = current_app.json.dumps
+        for row in rows:
+            yield dumps(row) + "\n"
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            row["recorded_at"] = row["recorded_at"].isoformat()
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if fmt == 'csv':
+        return Response(stream_with_context(generate_csv()), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=node_metrics.csv"})
+    return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
+
+@node_bp.route("/select-nodes/preview")
+def preview_select_nodes():
+    """Nodes /select-nodes would pick now, without recording a selection.
+
+    Read-only, so the spawn form can call it on every profile click; the
+    response is briefly cacheable and revalidates with If-None-Match.
+    """
+    profile_id = request.args.get('profile_id', type=int)
+    num_nodes = request.args.get('num_nodes', type=int)
+    algorithm = request.args.get('algorithm')
+    if not profile_id:
+        return jsonify({"error": "profile_id is required"}), 400
+
+    try:
+        selected = node_service.preview_nodes_for_profile(
+            profile_id=profile_id, num_nodes=num_nodes, algorithm=algorithm
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error previewing node selection: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+    etag = selection_etag(selected)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"private, max-age={Config.SELECTION_PREVIEW_MAX_AGE}"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    return jsonify({
+        "status": "ok",
+        "preview": True,
+        "selected_nodes": selected,
+        "count": len(selected)
+    }), 200, headers
+
 @node_bp.route("/select-nodes", methods=["POST"])
 def select_nodes():
-    """Select nodes based on requirements"""
+    """Select nodes based on requirements.
+
+    ``algorithm`` (best_fit, round_robin, random, power_of_two or
+    least_connection) overrides the profile's selection_algorithm.
+    """
     data = request.get_json()
 
     try:
@@ -95,6 +204,7 @@ def select_nodes():
         profile_id = data.get('profile_id')
         num_nodes = data.get('num_nodes', 1)
         user_id = data.get('user_id')
+        algorithm = data.get('algorithm')
 
         if not profile_id:
             return jsonify({"error": "profile_id is required"}), 400
@@ -103,7 +213,8 @@ def select_nodes():
         selected = node_service.select_nodes_for_profile(
             profile_id=profile_id,
             num_nodes=num_nodes,
-            user_id=user_id
+            user_id=user_id,
+            algorithm=algorithm
         )
 
         return jsonify({
@@ -117,25 +228,64 @@ def select_nodes():
         logger.error(f"Error selecting nodes: {e}")
         return jsonify({"error": "Internal error"}), 500
 
+@node_bp.route("/nodes/stream")
+def stream_nodes():
+    """Server-Sent Events: a snapshot, then every node whose state changed.
+
+    Reconnecting clients send Last-Event-ID (or last_event_id=) and get the
+    buffered events they missed, or a fresh snapshot if too much was missed.
+    profile_id= limits the stream to that profile's available nodes.
+
+    Each open stream holds a gthread worker thread, so this endpoint is off
+    unless NODE_STREAM_SYNC_ENABLED is set; serve streams from the async app.
+    """
+    if not Config.NODE_STREAM_SYNC_ENABLED:
+        return jsonify({"error": "Node stream is served by the async app (async_app.py)"}), 404
+
+    stream_filter = None
+    profile_id = request.args.get('profile_id', type=int)
+    if profile_id:
+        criteria = profile_index.get_profile(profile_id)
+        if criteria is None:
+            return jsonify({"error": f"Profile {profile_id} not found"}), 404
+        stream_filter = StreamFilter(lambda n: bool(filter_available_nodes([n], criteria)))
+
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    )
+    subscription, backlog = node_events.subscribe(last_event_id)
+    if backlog is None:
+        nodes = node_service.get_all_nodes()
+        if stream_filter is not None:
+            backlog = [stream_filter.snapshot(nodes, node_events.last_seq)]
+        else:
+            backlog = [snapshot_event(nodes, node_events.last_seq)]
+
+    def generate():
+        try:
+            yield f"retry: {Config.NODE_STREAM_RETRY_MS}\n\n"
+            for event in backlog:
+                if stream_filter is not None:
+                    event = stream_filter.apply(event)
+                if event is not None:
+                    yield event.encode()
+            while not subscription.closed:
+                try:
+                    event = subscription.queue.get(timeout=Config.NODE_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if stream_filter is not None:
+                    event = stream_filter.apply(event)
+                if event is not None:
+                    yield event.encode()
+        finally:
+            node_events.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers=STREAM_HEADERS)
+
 @node_bp.route("/cluster-summary")
 def cluster_summary():
     """Get cluster summary statistics"""
     nodes = node_service.get_all_nodes()
-
-    total_containers = {
-        "jupyterlab": sum(n.get("active_jupyterlab", 0) for n in nodes),
-        "ray": sum(n.get("active_ray", 0) for n in nodes),
-        "total": sum(n.get("total_containers", 0) for n in nodes),
-    }
-
-    resource_usage = {
-        "avg_cpu": round(sum(n.get("cpu_usage_percent", 0) for n in nodes) / len(nodes), 2) if nodes else 0,
-        "avg_memory": round(sum(n.get("memory_usage_percent", 0) for n in nodes) / len(nodes), 2) if nodes else 0,
-    }
-
-    return jsonify({
-        "total_nodes": len(nodes),
-        "active_nodes": len([n for n in nodes if n.get("is_active")]),
-        "total_containers": total_containers,
-        "resource_usage": resource_usage
-    })
\ No newline at end of file
+    return jsonify(summarize_cluster(nodes))
\ No newline at end of file
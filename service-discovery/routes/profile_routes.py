@@ -1,4 +1,5 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+from services.profile_cache import profile_cache
 from services.profile_service import ProfileService
 import logging
 
@@ -11,12 +12,19 @@ profile_bp = Blueprint('profiles', __name__)
 def get_profiles():
     """Get all profiles"""
     active_only = request.args.get('active_only', 'true').lower() == 'true'
-    profiles = ProfileService.get_all_profiles(active_only=active_only)
+    profiles, etag = profile_cache.get_all(active_only=active_only)
 
-    return jsonify({
+    # Let clients revalidate with If-None-Match instead of re-downloading
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+    response = jsonify({
         "total": len(profiles),
-        "profiles": [p.to_dict() for p in profiles]
+        "profiles": profiles
     })
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 @profile_bp.route("/profiles", methods=["POST"])
 def create_profile():
@@ -37,9 +45,9 @@ def create_profile():
 @profile_bp.route("/profiles/<int:profile_id>", methods=["GET"])
 def get_profile(profile_id):
     """Get a specific profile"""
-    profile = ProfileService.get_profile(profile_id)
+    profile = profile_cache.get(profile_id)
     if profile:
-        return jsonify(profile.to_dict())
+        return jsonify(profile)
     else:
         return jsonify({"error": "Profile not found"}), 404
 
@@ -0,0 +1,297 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from models import Node, NodeMetric, NodeMetricRollupWatermark, NodeSelection, Profile
+from services.async_redis_service import AsyncRedisService
+from services.metric_writer import Heartbeat, invalid_node_fields, metric_rows, missing_node_fields, node_upsert_statements
+from services.node_service import (
+    apply_reservations,
+    clamp_node_count,
+    downsample_payload,
+    downsample_statement,
+    export_statement,
+    filter_available_nodes,
+    reserved_selection,
+)
+from services.profile_index import profile_criteria
+from utils.bin_packing import demand_for_profile
+from utils.gpu import apply_gpu_placement
+from utils.load_balancer import BIN_PACKING, reservation_candidates, resolve_algorithm, select_nodes_by_algorithm
+from utils.scoring import calculate_node_score, node_load_score
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def create_engine() -> AsyncEngine:
+    """asyncpg engine pointed at the same database as the sync app"""
+    return create_async_engine(
+        Config.ASYNC_DATABASE_URI,
+        pool_size=Config.ASYNC_DB_POOL_SIZE,
+        max_overflow=Config.ASYNC_DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        echo=Config.SQLALCHEMY_ECHO,
+    )
+
+
+class AsyncNodeService:
+    """
+    asyncio counterpart of NodeService for the async app.
+
+    Filtering, scoring and SQL construction are the helpers NodeService
+    uses; only the I/O differs. Every read goes to Postgres and Redis
+    directly (there is no in-process snapshot), and heartbeats are written
+    synchronously per request instead of through the write-behind queue.
+    """
+
+    def __init__(self, redis_service: AsyncRedisService, engine: AsyncEngine):
+        self.redis = redis_service
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def register_node(self, node_data: dict) -> Tuple[bool, str]:
+        """Register or update a node in both Redis and PostgreSQL"""
+        hostname = node_data.get('hostname')
+        if not hostname:
+            return False, "Hostname is required"
+
+        invalid = invalid_node_fields(node_data)
+        if invalid:
+            return False, f"Invalid values for: {', '.join(invalid)}"
+
+        try:
+            missing = missing_node_fields(node_data)
+            if missing:
+                async with self.sessions() as session:
+                    if not await self._node_id(session, hostname):
+                        return False, f"Missing required fields for new node: {', '.join(missing)}"
+
+            load_score = calculate_node_score(node_data)
+            await self.redis.set_node_info(hostname, node_data, load_score=load_score)
+
+            heartbeats = [Heartbeat(hostname, node_data, load_score, datetime.now())]
+            async with self.sessions() as session:
+                node_ids = {}
+                for stmt in node_upsert_statements(heartbeats):
+                    node_ids.update({hostname: node_id for node_id, hostname in await session.execute(stmt)})
+                await session.execute(insert(NodeMetric), metric_rows(heartbeats, node_ids))
+                await session.commit()
+
+            return True, "Node registered successfully"
+
+        except Exception as e:
+            logger.error(f"Error registering node: {e}")
+            return False, str(e)
+
+    async def get_all_nodes(self, include_inactive: bool = False) -> List[Dict]:
+        """Read all nodes from PostgreSQL with current metrics from Redis"""
+        stmt = select(Node)
+        if not include_inactive:
+            stmt = stmt.where(Node.is_active.is_(True))
+
+        async with self.sessions() as session:
+            nodes = (await session.execute(stmt)).scalars().all()
+
+        redis_data = await self.redis.get_nodes_info(
+            [node.hostname for node in nodes],
+            fields=Node.REDIS_METRIC_FIELDS
+        )
+        ewma = await self.redis.get_nodes_ewma([node.hostname for node in nodes])
+
+        result = []
+        for node in nodes:
+            if node.hostname in redis_data:
+                node.update_current_metrics(redis_data[node.hostname])
+            node_dict = {**node.to_dict(), **ewma.get(node.hostname, {})}
+            node_dict['load_score'] = node_load_score(node_dict)
+            result.append(node_dict)
+        return result
+
+    async def get_profile(self, profile_id: int) -> Optional[Dict]:
+        async with self.sessions() as session:
+            profile = await session.get(Profile, profile_id)
+        return profile.to_dict() if profile else None
+
+    async def get_profiles(self, active_only: bool = True) -> List[Dict]:
+        stmt = select(Profile).order_by(Profile.id)
+        if active_only:
+            stmt = stmt.where(Profile.is_active.is_(True))
+
+        async with self.sessions() as session:
+            profiles = (await session.execute(stmt)).scalars().all()
+        return [p.to_dict() for p in profiles]
+
+    async def get_available_nodes(self, profile_id: Optional[int] = None,
+                                  strict_filter: bool = False,
+                                  include_reservations: bool = True) -> List[Dict]:
+        """Get available nodes based on criteria, live reservations included by default"""
+        profile = None
+        if profile_id:
+            profile = await self.get_profile(profile_id)
+            if profile:
+                profile = profile_criteria(profile)
+
+        return await self._filter_available(profile, strict_filter, include_reservations)
+
+    async def _filter_available(self, criteria: Optional[dict], strict_filter: bool = False,
+                                include_reservations: bool = True) -> List[Dict]:
+        nodes = await self.get_all_nodes()
+        if include_reservations:
+            apply_reservations(nodes, await self.redis.get_reservations())
+        return filter_available_nodes(nodes, criteria, strict_filter=strict_filter)
+
+    async def preview_nodes_for_profile(self, profile_id: int,
+                                        num_nodes: Optional[int] = None,
+                                        algorithm: Optional[str] = None) -> List[Dict]:
+        """Nodes select_nodes_for_profile would pick right now, without recording anything"""
+        profile = await self.get_profile(profile_id)
+        if not profile:
+            raise ValueError(f"Profile {profile_id} not found")
+
+        algorithm = resolve_algorithm(algorithm, profile, Config.SELECTION_ALGORITHM)
+        num_nodes = clamp_node_count(profile, num_nodes)
+        available = await self._filter_available(profile_criteria(profile))
+        if profile.get('gpu_required'):
+            available = apply_gpu_placement(available)
+
+        if len(available) < num_nodes:
+            raise ValueError(f"Not enough nodes available. Required: {num_nodes}, Available: {len(available)}")
+
+        start = await self.redis.get_round_robin_counter() if algorithm == 'round_robin' else None
+        selected = select_nodes_by_algorithm(
+            available, algorithm, num_nodes, round_robin_start=start, demand=demand_for_profile(profile)
+        )
+        if len(selected) < num_nodes:
+            raise ValueError(f"Not enough nodes with free capacity. Required: {num_nodes}")
+        return selected
+
+    async def select_nodes_for_profile(self, profile_id: int,
+                                       num_nodes: Optional[int] = None,
+                                       user_id: Optional[str] = None,
+                                       algorithm: Optional[str] = None) -> List[Dict]:
+        """Select best nodes for a given profile, reserving their capacity
+        (see NodeService.select_nodes_for_profile)"""
+        profile = await self.get_profile(profile_id)
+        if not profile:
+            raise ValueError(f"Profile {profile_id} not found")
+
+        algorithm = resolve_algorithm(algorithm, profile, Config.SELECTION_ALGORITHM)
+        num_nodes = clamp_node_count(profile, num_nodes)
+        available = await self._filter_available(profile_criteria(profile), include_reservations=False)
+        if profile.get('gpu_required'):
+            available = apply_gpu_placement(available)
+        if len(available) < num_nodes:
+            raise ValueError(f"Not enough nodes available. Required: {num_nodes}, Available: {len(available)}")
+
+        start = await self.redis.advance_round_robin(num_nodes) if algorithm == 'round_robin' else None
+        demand = demand_for_profile(profile)
+        candidates, rank = reservation_candidates(
+            available, algorithm, num_nodes, Config.RESERVATION_CANDIDATES,
+            round_robin_start=start, demand=demand
+        )
+        picks = await self.redis.reserve_nodes(
+            candidates, num_nodes, uuid.uuid4().hex, rank,
+            demand=demand if algorithm in BIN_PACKING else None
+        )
+        if picks is None:
+            selected = candidates[:num_nodes]
+        else:
+            selected = reserved_selection(candidates, picks)
+        if len(selected) < num_nodes:
+            raise ValueError(f"Not enough nodes with free capacity. Required: {num_nodes}")
+
+        async with self.sessions() as session:
+            session.add(NodeSelection(
+                profile_id=profile_id,
+                user_id=user_id,
+                selected_nodes=[{'id': n.get('id'), 'hostname': n.get('hostname')} for n in selected],
+                selection_reason=f'profile_based:{algorithm}'
+            ))
+            await session.commit()
+
+        return selected
+
+    async def get_node_by_hostname(self, hostname: str) -> Optional[Dict]:
+        """Get specific node by hostname"""
+        async with self.sessions() as session:
+            node = (await session.execute(
+                select(Node).where(Node.hostname == hostname)
+            )).scalars().first()
+        if not node:
+            return None
+
+        redis_data = await self.redis.get_node_info(hostname, fields=Node.REDIS_METRIC_FIELDS)
+        if redis_data:
+            node.update_current_metrics(redis_data)
+
+        ewma = await self.redis.get_nodes_ewma([hostname])
+        node_dict = {**node.to_dict(), **ewma.get(hostname, {})}
+        node_dict['load_score'] = node_load_score(node_dict)
+        return node_dict
+
+    async def _node_id(self, session: AsyncSession, hostname: str) -> Optional[int]:
+        return (await session.execute(
+            select(Node.id).where(Node.hostname == hostname)
+        )).scalar()
+
+    async def get_node_metrics_history(self, hostname: str, hours: int = 24) -> List[Dict]:
+        """Get historical metrics for a node"""
+        async with self.sessions() as session:
+            node_id = await self._node_id(session, hostname)
+            if node_id is None:
+                return []
+
+            since = datetime.now() - timedelta(hours=hours)
+            metrics = (await session.execute(
+                select(NodeMetric)
+                # to_dict reads metric.node; lazy loads are not allowed under asyncio
+                .options(selectinload(NodeMetric.node))
+                .where(NodeMetric.node_id == node_id, NodeMetric.recorded_at >= since)
+                .order_by(NodeMetric.recorded_at.desc())
+            )).scalars().all()
+
+        return [m.to_dict() for m in metrics]
+
+    async def get_node_metrics_downsampled(self, hostname: str, hours: int = 24,
+                                           step: int = 300, agg: str = 'avg') -> Optional[Dict]:
+        """Get node metrics bucketed in SQL (see NodeService.get_node_metrics_downsampled)"""
+        async with self.sessions() as session:
+            node_id = await self._node_id(session, hostname)
+            if node_id is None:
+                return None
+
+            watermarks = {
+                w.resolution: w.rolled_up_to
+                for w in (await session.execute(select(NodeMetricRollupWatermark))).scalars()
+            }
+            source, stmt = downsample_statement(node_id, hours, step, agg, watermarks)
+            rows = (await session.execute(stmt)).all()
+
+        return downsample_payload(source, rows)
+
+    async def iter_metrics_export(self, since: datetime, until: datetime,
+                                  hostname: Optional[str] = None,
+                                  page_size: int = 5000) -> AsyncIterator[Dict]:
+        """Yield NodeMetric rows by keyset pages, each streamed from a server-side cursor"""
+        page_size = max(1, page_size)
+        last_key = None
+        async with self.sessions() as session:
+            while True:
+                stmt = export_statement(since, until, hostname, page_size, last_key)
+
+                rows = 0
+                result = await session.stream(stmt.execution_options(yield_per=min(page_size, 1000)))
+                async for row in result:
+                    rows += 1
+                    last_key = (row.node_id, row.recorded_at, row.id)
+                    yield row._asdict()
+
+                if rows < page_size:
+                    return
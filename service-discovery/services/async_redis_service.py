@@ -0,0 +1,192 @@
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import Config
+from redis_client import create_async_client
+from services import redis_scripts
+from services.redis_service import (
+    RedisService,
+    hash_read_plan,
+    heartbeat_call,
+    parse_hash_replies,
+    parse_info_blobs,
+    parse_ewma_replies,
+    parse_reserve_reply,
+    queue_ewma_reads,
+    queue_hash_reads,
+    reservation_key,
+    reserve_call,
+)
+from utils.bin_packing import Demand
+from utils.scoring import calculate_node_score
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRedisService:
+    """
+    asyncio counterpart of RedisService for the async app.
+
+    Keys, scripts and encoding are shared with RedisService, so sync and
+    async workers can serve the same cluster side by side.
+    """
+    NODE_INDEX_KEY = RedisService.NODE_INDEX_KEY
+    LOAD_INDEX_KEY = RedisService.LOAD_INDEX_KEY
+    NODE_EVENTS_CHANNEL = RedisService.NODE_EVENTS_CHANNEL
+    RESERVED_INDEX_KEY = RedisService.RESERVED_INDEX_KEY
+
+    def __init__(self):
+        self.client = None
+        self._scripts = {}
+        self._round_robin_counter = 0
+
+    async def connect(self):
+        """Create the client on the running event loop"""
+        try:
+            self.client = create_async_client()
+            self._scripts = {
+                'heartbeat': self.client.register_script(redis_scripts.HEARTBEAT),
+                'heartbeat_hash': self.client.register_script(redis_scripts.HEARTBEAT_HASH),
+                'reserve': self.client.register_script(redis_scripts.RESERVE),
+            }
+        except Exception as e:
+            logger.error(f"Failed to set up async Redis client: {e}")
+            self.client = None
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def is_connected(self) -> bool:
+        """Check if Redis is connected"""
+        if not self.client:
+            return False
+        try:
+            await self.client.ping()
+            return True
+        except Exception:
+            return False
+
+    async def set_node_info(self, hostname: str, data: dict,
+                            load_score: Optional[float] = None) -> bool:
+        """Store a node heartbeat in Redis (see RedisService.set_node_info)"""
+        if not self.client:
+            return False
+
+        if load_score is None:
+            load_score = calculate_node_score(data)
+
+        try:
+            script, keys, args = heartbeat_call(hostname, data, load_score)
+            await self._scripts[script](keys=keys, args=args, client=self.client)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing node info: {e}")
+            return False
+
+    async def get_node_info(self, hostname: str,
+                            fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        return (await self.get_nodes_info([hostname], fields)).get(hostname)
+
+    async def get_nodes_info(self, hostnames: Sequence[str],
+                             fields: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Retrieve information for several nodes in one round trip, keyed by hostname"""
+        if not self.client or not hostnames:
+            return {}
+
+        try:
+            if Config.REDIS_NODE_LAYOUT == 'hash':
+                static_fields, metric_fields = hash_read_plan(fields)
+                pipe = self.client.pipeline(transaction=False)
+                queue_hash_reads(pipe, hostnames, static_fields, metric_fields)
+                return parse_hash_replies(hostnames, await pipe.execute(), static_fields, metric_fields)
+
+            values = await self.client.mget([f"node:{h}:info" for h in hostnames])
+        except Exception as e:
+            logger.error(f"Error retrieving node info: {e}")
+            return {}
+
+        return parse_info_blobs(hostnames, values, fields)
+
+    async def get_nodes_ewma(self, hostnames: Sequence[str]) -> Dict[str, Dict]:
+        """Moving averages per hostname (see RedisService.get_nodes_ewma)"""
+        if not self.client or not hostnames:
+            return {}
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            queue_ewma_reads(pipe, hostnames)
+            return parse_ewma_replies(hostnames, await pipe.execute())
+        except Exception as e:
+            logger.error(f"Error reading moving averages: {e}")
+            return {}
+
+    async def get_live_hostnames(self) -> List[str]:
+        """Get hostnames with a heartbeat inside the expiry window"""
+        if not self.client:
+            return []
+
+        try:
+            since = time.time() - Config.REDIS_EXPIRE_SECONDS
+            return await self.client.zrangebyscore(self.NODE_INDEX_KEY, since, "+inf")
+        except Exception as e:
+            logger.error(f"Error listing live nodes: {e}")
+            return []
+
+    async def reserve_nodes(self, candidates: Sequence[Dict], count: int, reservation_id: str,
+                            rank: str = 'score', demand: Optional[Demand] = None) -> Optional[List[Tuple[int, int]]]:
+        """Atomically reserve capacity on the best candidates (see RedisService.reserve_nodes)"""
+        if not self.client:
+            return None
+
+        try:
+            keys, args = reserve_call(candidates, count, reservation_id, rank, demand)
+            return parse_reserve_reply(await self._scripts['reserve'](keys=keys, args=args, client=self.client))
+        except Exception as e:
+            logger.error(f"Error reserving nodes: {e}")
+            return None
+
+    async def get_reservations(self) -> Dict[str, int]:
+        """Live reservation count per reserved node"""
+        if not self.client:
+            return {}
+
+        try:
+            cutoff = time.time() - Config.RESERVATION_TTL
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zremrangebyscore(self.RESERVED_INDEX_KEY, "-inf", f"({cutoff}")
+            pipe.zrange(self.RESERVED_INDEX_KEY, 0, -1)
+            _, hostnames = await pipe.execute()
+            if not hostnames:
+                return {}
+
+            pipe = self.client.pipeline(transaction=False)
+            for hostname in hostnames:
+                pipe.zcount(reservation_key(hostname), cutoff, "+inf")
+            return {h: n for h, n in zip(hostnames, await pipe.execute()) if n}
+        except Exception as e:
+            logger.error(f"Error reading reservations: {e}")
+            return {}
+
+    async def advance_round_robin(self, step: int) -> int:
+        """Reserve ``step`` positions on the shared round-robin counter and return
+        the first; falls back to a per-process counter while Redis is down"""
+        if self.client:
+            try:
+                return await self.client.incrby(Config.ROUND_ROBIN_COUNTER_KEY, step) - step
+            except Exception as e:
+                logger.warning(f"Round-robin counter unavailable in Redis, using local counter: {e}")
+
+        start = self._round_robin_counter
+        self._round_robin_counter = (start + step) % 1_000_000
+        return start
+
+    async def get_round_robin_counter(self) -> int:
+        if not self.client:
+            return self._round_robin_counter
+
+        try:
+            return int(await self.client.get(Config.ROUND_ROBIN_COUNTER_KEY) or 0)
+        except Exception:
+            return self._round_robin_counter
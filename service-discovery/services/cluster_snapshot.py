@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from models import Node
+from services.profile_index import profile_index
+from utils.scoring import EWMA_FIELDS, node_load_score
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat fields copied onto a snapshot node
+STATIC_FIELDS = ('ip', 'cpu_cores', 'ram_gb', 'has_gpu', 'gpu_info', 'max_containers')
+
+
+class ClusterSnapshot:
+    """Immutable view of every known node, keyed by hostname"""
+
+    def __init__(self, version: int, nodes: Dict[str, dict], refreshed_at: float):
+        self.version = version
+        self.nodes = MappingProxyType(nodes)
+        # Monotonic time of the last full rebuild from Postgres + Redis
+        self.refreshed_at = refreshed_at
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.refreshed_at
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class ClusterSnapshotStore:
+    """
+    Holds the current ClusterSnapshot and publishes new ones by atomic
+    reference swap. Readers never lock; writers build a modified copy
+    under a lock and swap it in.
+
+    Freshness comes from three sources:
+      - every heartbeat received on the Redis node events channel (all workers)
+      - a full rebuild every CLUSTER_SNAPSHOT_REFRESH_INTERVAL seconds
+      - a synchronous rebuild by any reader that finds the snapshot older
+        than CLUSTER_SNAPSHOT_MAX_STALENESS, which bounds staleness even if
+        the background thread stalls
+    """
+
+    def __init__(self, loader: Callable[[], List[dict]], redis_service=None):
+        self._loader = loader
+        self._redis = redis_service
+        self._snapshot = ClusterSnapshot(0, {}, float('-inf'))
+        self._write_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._threads = []
+        self.app = None
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def init_app(self, app):
+        """Start the refresher and event listener threads for this app"""
+        if self.running:
+            return
+        self.app = app
+        self._threads = [
+            threading.Thread(target=self._refresh_loop, name="snapshot-refresh", daemon=True),
+        ]
+        if self._redis is not None:
+            self._threads.append(
+                threading.Thread(target=self._listen_loop, name="snapshot-events", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def current(self) -> ClusterSnapshot:
+        """Latest snapshot, rebuilt synchronously if it is older than the staleness bound"""
+        snapshot = self._snapshot
+        if snapshot.age > Config.CLUSTER_SNAPSHOT_MAX_STALENESS:
+            # One reader rebuilds, concurrent readers wait and reuse its result
+            with self._rebuild_lock:
+                snapshot = self._snapshot
+                if snapshot.age > Config.CLUSTER_SNAPSHOT_MAX_STALENESS:
+                    snapshot = self.rebuild()
+        return snapshot
+
+    def get_nodes(self, include_inactive: bool = False) -> List[dict]:
+        """Copies of the snapshot nodes, safe for callers to mutate"""
+        return [
+            dict(node) for node in self.current().nodes.values()
+            if include_inactive or node.get('is_active')
+        ]
+
+    def get_node(self, hostname: str) -> Optional[dict]:
+        node = self.current().nodes.get(hostname)
+        return dict(node) if node else None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "running": self.running,
+            "version": snapshot.version,
+            "nodes": len(snapshot),
+            "age_seconds": round(snapshot.age, 2) if snapshot.version else None,
+        }
+
+    def rebuild(self) -> ClusterSnapshot:
+        """Replace the snapshot with a full read from Postgres + Redis"""
+        nodes = {}
+        for node in self._loader():
+            node['load_score'] = node_load_score(node)
+            nodes[node['hostname']] = node
+
+        with self._write_lock:
+            snapshot = ClusterSnapshot(self._snapshot.version + 1, nodes, time.monotonic())
+            self._snapshot = snapshot
+        return snapshot
+
+    def apply_heartbeat(self, node_data: dict):
+        """Publish a copy of the snapshot with one node's heartbeat merged in.
+
+        Nodes not in the snapshot yet are left to the next rebuild, which
+        loads them with their database id and timestamps.
+        """
+        hostname = node_data.get('hostname')
+        if not hostname:
+            return
+
+        with self._write_lock:
+            current = self._snapshot
+            if hostname not in current.nodes:
+                return
+            node = dict(current.nodes[hostname])
+            node.update({f: node_data[f] for f in STATIC_FIELDS if f in node_data})
+            node.update({f: node_data.get(f, 0) for f in Node.REDIS_METRIC_FIELDS})
+            node.update({f: node_data[f] for f in EWMA_FIELDS.values() if f in node_data})
+            node['is_active'] = True
+            node['updated_at'] = datetime.now()
+            node['load_score'] = node_load_score(node)
+            profile_index.update_node(node)
+
+            nodes = dict(current.nodes)
+            nodes[hostname] = node
+            self._snapshot = ClusterSnapshot(current.version + 1, nodes, current.refreshed_at)
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.rebuild()
+            except Exception as e:
+                logger.error(f"Error rebuilding cluster snapshot: {e}")
+            time.sleep(Config.CLUSTER_SNAPSHOT_REFRESH_INTERVAL)
+
+    def _listen_loop(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.subscribe_node_events()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        event = json.loads(message['data'])
+                        # Moving averages travel beside the raw heartbeat
+                        self.apply_heartbeat({**event['node'], **(event.get('ewma') or {})})
+            except Exception as e:
+                logger.error(f"Node events listener failed, resubscribing: {e}")
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
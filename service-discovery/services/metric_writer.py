@@ -0,0 +1,252 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from models import db, Node, NodeMetric
+
+logger = logging.getLogger(__name__)
+
+# Static node columns refreshed from each heartbeat when present
+STATIC_NODE_FIELDS = ('ip', 'cpu_cores', 'ram_gb', 'has_gpu', 'gpu_info')
+
+# NOT NULL columns a heartbeat must carry to create a node
+REQUIRED_NODE_FIELDS = ('ip', 'cpu_cores', 'ram_gb')
+
+# Types heartbeat fields must have when present, matching their columns
+# (and what scoring does with them); booleans do not count as numbers
+NODE_FIELD_TYPES = {
+    'ip': (str,),
+    'cpu_cores': (int,),
+    'ram_gb': (int, float),
+    'has_gpu': (bool,),
+    'gpu_info': (list,),
+    'max_containers': (int,),
+    'cpu_usage_percent': (int, float),
+    'memory_usage_percent': (int, float),
+    'disk_usage_percent': (int, float),
+    'active_jupyterlab': (int,),
+    'active_ray': (int,),
+    'total_containers': (int,),
+}
+
+
+class Heartbeat(NamedTuple):
+    hostname: str
+    node_data: dict
+    load_score: float
+    recorded_at: datetime
+
+
+def missing_node_fields(node_data: dict) -> List[str]:
+    """Required fields absent (or null) in a heartbeat"""
+    return [f for f in REQUIRED_NODE_FIELDS if node_data.get(f) is None]
+
+
+def invalid_node_fields(node_data: dict) -> List[str]:
+    """Fields present in a heartbeat with a value of the wrong type"""
+    invalid = []
+    for field, types in NODE_FIELD_TYPES.items():
+        value = node_data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            invalid.append(field)
+    return invalid
+
+
+def node_upsert_statements(heartbeats: List[Heartbeat]) -> list:
+    """Multi-row INSERT ... ON CONFLICT (hostname) DO UPDATE statements for
+    the static node columns, returning (id, hostname) for every heartbeat's node.
+
+    Only the fields a heartbeat carries are written, so missing ones keep
+    their stored value (or the column default for a new node). Rows are
+    grouped by the fields they carry, normally into a single statement.
+    """
+    # ON CONFLICT cannot touch the same row twice, keep the latest static facts
+    latest: Dict[str, Heartbeat] = {}
+    for hb in heartbeats:
+        latest[hb.hostname] = hb
+
+    groups: Dict[tuple, List[Dict]] = {}
+    for hb in latest.values():
+        fields = tuple(f for f in STATIC_NODE_FIELDS if hb.node_data.get(f) is not None)
+        row = {f: hb.node_data[f] for f in fields}
+        row.update(hostname=hb.hostname, is_active=True,
+                   created_at=hb.recorded_at, updated_at=hb.recorded_at)
+        groups.setdefault(fields, []).append(row)
+
+    statements = []
+    for fields, node_rows in groups.items():
+        stmt = pg_insert(Node).values(node_rows)
+        statements.append(stmt.on_conflict_do_update(
+            index_elements=[Node.hostname],
+            set_={
+                **{f: stmt.excluded[f] for f in fields},
+                'is_active': True,
+                'updated_at': stmt.excluded.updated_at,
+            }
+        ).returning(Node.id, Node.hostname))
+    return statements
+
+
+def metric_rows(heartbeats: List[Heartbeat], node_ids: Dict[str, int]) -> List[Dict]:
+    """node_metrics rows for a batch of heartbeats, given their node ids by hostname"""
+    return [
+        {
+            'node_id': node_ids[hb.hostname],
+            'cpu_usage_percent': hb.node_data.get('cpu_usage_percent', 0),
+            'memory_usage_percent': hb.node_data.get('memory_usage_percent', 0),
+            'disk_usage_percent': hb.node_data.get('disk_usage_percent', 0),
+            'active_jupyterlab': hb.node_data.get('active_jupyterlab', 0),
+            'active_ray': hb.node_data.get('active_ray', 0),
+            'total_containers': hb.node_data.get('total_containers', 0),
+            'load_score': hb.load_score,
+            'recorded_at': hb.recorded_at,
+        }
+        for hb in heartbeats
+    ]
+
+
+def persist_heartbeats(heartbeats: List[Heartbeat]):
+    """Upsert nodes and append metric history for a batch of heartbeats.
+
+    Runs one multi-row INSERT ... ON CONFLICT (hostname) DO UPDATE for the
+    static node columns and one multi-row insert into node_metrics, then
+    commits once. Must be called inside an app context.
+    """
+    if not heartbeats:
+        return
+
+    try:
+        node_ids = {
+            hostname: node_id
+            for stmt in node_upsert_statements(heartbeats)
+            for node_id, hostname in db.session.execute(stmt)
+        }
+        db.session.execute(insert(NodeMetric), metric_rows(heartbeats, node_ids))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+class MetricWriteBehind:
+    """
+    Bounded in-process queue that flushes heartbeats to Postgres in bulk
+    from a background thread, every ``batch_size`` rows or ``flush_interval``
+    seconds, whichever comes first.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = Config.METRICS_BATCH_SIZE
+        self.flush_interval = Config.METRICS_FLUSH_INTERVAL
+        self.enqueue_timeout = Config.METRICS_ENQUEUE_TIMEOUT
+        self._queue = queue.Queue(maxsize=Config.METRICS_QUEUE_MAX)
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def init_app(self, app):
+        """Start the flusher thread for this app"""
+        if self.running:
+            return
+        self.app = app
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metric-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Metric write-behind started (batch={self.batch_size}, "
+                    f"interval={self.flush_interval}s, queue={self._queue.maxsize})")
+
+    def submit(self, heartbeat: Heartbeat) -> bool:
+        """Queue a heartbeat. Returns False when the queue stays full
+        past the enqueue timeout; the caller should then write it synchronously."""
+        try:
+            self._queue.put(heartbeat, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            logger.warning("Metric write-behind queue full, applying backpressure")
+            return False
+
+    def stop(self, timeout: float = 10.0):
+        """Flush whatever is queued and stop the flusher thread"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "flushed": self.flushed,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._flush(self._drain(self.flush_interval))
+
+        # Shutdown: flush everything left in the queue
+        while not self._queue.empty():
+            self._flush(self._drain(0))
+
+    def _drain(self, wait: float) -> List[Heartbeat]:
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                if time.monotonic() >= deadline or self._stop.is_set():
+                    break
+        return batch
+
+    def _flush(self, batch: List[Heartbeat]):
+        if not batch:
+            return
+        with self.app.app_context():
+            self._persist(batch)
+
+    def _persist(self, batch: List[Heartbeat]):
+        """Write a batch; if a row is rejected, retry each half so one bad
+        heartbeat only costs itself"""
+        try:
+            persist_heartbeats(batch)
+            self.flushed += len(batch)
+        except OperationalError as e:
+            # Database unreachable, splitting would not help
+            self.failed += len(batch)
+            logger.error(f"Error flushing {len(batch)} heartbeats: {e}")
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                logger.error(f"Dropping heartbeat from {batch[0].hostname}: {e}")
+                return
+            logger.warning(f"Error flushing {len(batch)} heartbeats, retrying in halves: {e}")
+            middle = len(batch) // 2
+            self._persist(batch[:middle])
+            self._persist(batch[middle:])
+
+
+metric_writer = MetricWriteBehind()
@@ -0,0 +1,303 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import Config
+from models import db, NodeMetric, NodeMetricRollup, NodeMetricRollupWatermark
+
+logger = logging.getLogger(__name__)
+
+# resolution -> (bucket width, source) ; coarser rollups are built from 1m buckets
+ROLLUP_RESOLUTIONS = {
+    '1m': (timedelta(minutes=1), 'raw'),
+    '5m': (timedelta(minutes=5), '1m'),
+    '1h': (timedelta(hours=1), '1m'),
+}
+
+_ORIGIN = "TIMESTAMP '2000-01-01'"
+# Same origin for bucketing in Python
+BUCKET_ORIGIN = datetime(2000, 1, 1)
+
+
+def bucket_floor(moment: datetime, width: timedelta) -> datetime:
+    """Start of the ``width`` bucket holding ``moment``, like date_bin in SQL"""
+    return moment - (moment - BUCKET_ORIGIN) % width
+
+
+class MetricsMaintenance:
+    """
+    Keeps the partitioned node_metrics table healthy: creates upcoming
+    partitions, drops partitions past retention and maintains rollups.
+    Tables created before partitioning get retention by batched deletes.
+    All methods must run inside an app context.
+    """
+
+    @staticmethod
+    def _partition_width() -> timedelta:
+        return timedelta(weeks=1) if Config.METRICS_PARTITION_INTERVAL == 'week' else timedelta(days=1)
+
+    @classmethod
+    def _partition_start(cls, moment: datetime) -> datetime:
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        if Config.METRICS_PARTITION_INTERVAL == 'week':
+            start -= timedelta(days=start.weekday())
+        return start
+
+    @staticmethod
+    def is_partitioned() -> bool:
+        """False for tables created before partitioning was introduced"""
+        relkind = db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :name"),
+            {"name": NodeMetric.__tablename__}
+        ).scalar()
+        return relkind == 'p'
+
+    @staticmethod
+    def _exists(name: str) -> bool:
+        return db.session.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+    @classmethod
+    def ensure_partitions(cls, now: datetime = None) -> List[str]:
+        """Create the current and upcoming partitions plus a default catch-all"""
+        table = NodeMetric.__tablename__
+        if not cls.is_partitioned():
+            # Retention falls back to delete_expired_rows, which needs this index
+            db.session.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_recorded_at ON {table} (recorded_at)"
+            ))
+            db.session.commit()
+            logger.warning(f"{table} is not partitioned; raw retention uses batched deletes")
+            return []
+
+        now = now or datetime.now()
+        width = cls._partition_width()
+        start = cls._partition_start(now)
+        default = f"{table}_default"
+        has_default = cls._exists(default)
+
+        created = []
+        for i in range(Config.METRICS_PARTITIONS_AHEAD + 1):
+            lower = start + width * i
+            upper = lower + width
+            name = f"{table}_p{lower:%Y%m%d}"
+            if not cls._exists(name):
+                bounds = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                if has_default:
+                    cls._create_from_default(name, default, bounds, lower, upper)
+                else:
+                    db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+            created.append(name)
+
+        db.session.execute(text(f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {table} DEFAULT"))
+        db.session.commit()
+        return created
+
+    @staticmethod
+    def _create_from_default(name: str, default: str, bounds: str, lower: datetime, upper: datetime):
+        """Create a partition whose range already has rows in the default
+        partition, which would make a plain CREATE ... PARTITION OF fail:
+        detach the default, create the partition, move the rows over and
+        attach the default again, all in the caller's transaction"""
+        table = NodeMetric.__tablename__
+        window = {"lower": lower, "upper": upper}
+        stray = db.session.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} WHERE recorded_at >= :lower AND recorded_at < :upper)"
+        ), window).scalar()
+        if not stray:
+            db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+            return
+
+        db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+        moved = db.session.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE recorded_at >= :lower AND recorded_at < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), window).rowcount
+        db.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        logger.info(f"Moved {moved} rows from {default} into new partition {name}")
+
+    @staticmethod
+    def delete_expired_rows(table: str, cutoff: datetime) -> int:
+        """Delete rows recorded before ``cutoff`` from a plain table (or a
+        leaf partition), METRICS_RETENTION_DELETE_BATCH rows per transaction
+        and at most METRICS_RETENTION_MAX_BATCHES batches per call, so a
+        large backlog is worked off over several passes without long locks"""
+        deleted = 0
+        for _ in range(Config.METRICS_RETENTION_MAX_BATCHES):
+            count = db.session.execute(text(
+                f"DELETE FROM {table} WHERE ctid IN "
+                f"(SELECT ctid FROM {table} WHERE recorded_at < :cutoff LIMIT :batch)"
+            ), {"cutoff": cutoff, "batch": Config.METRICS_RETENTION_DELETE_BATCH}).rowcount
+            db.session.commit()
+            deleted += count
+            if count < Config.METRICS_RETENTION_DELETE_BATCH:
+                break
+        if deleted:
+            logger.info(f"Deleted {deleted} expired rows from {table}")
+        return deleted
+
+    @classmethod
+    def drop_expired_partitions(cls, now: datetime = None) -> List[str]:
+        """Drop whole partitions older than the raw retention window and
+        delete expired rows from the default partition; on an unpartitioned
+        table, delete expired rows in batches instead"""
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=Config.METRICS_RAW_RETENTION_DAYS)
+        table = NodeMetric.__tablename__
+        if not cls.is_partitioned():
+            cls.delete_expired_rows(table, cutoff)
+            return []
+
+        children = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ), {"table": table}).scalars().all()
+
+        dropped = []
+        for name in children:
+            try:
+                lower = datetime.strptime(name.rsplit('_p', 1)[1], '%Y%m%d')
+            except (IndexError, ValueError):
+                # Default partition: rows outside every range age out row by row
+                cls.delete_expired_rows(name, cutoff)
+                continue
+            if lower + cls._partition_width() <= cutoff:
+                db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+
+        db.session.commit()
+        if dropped:
+            logger.info(f"Dropped expired metric partitions: {', '.join(dropped)}")
+        return dropped
+
+    @staticmethod
+    def rollup_watermarks() -> Dict[str, datetime]:
+        """rolled_up_to per resolution; missing until its first refresh"""
+        return {w.resolution: w.rolled_up_to for w in NodeMetricRollupWatermark.query.all()}
+
+    @staticmethod
+    def _oldest_source(resolution: str, source: str) -> Optional[datetime]:
+        if source == 'raw':
+            return db.session.query(func.min(NodeMetric.recorded_at)).scalar()
+        return db.session.query(func.min(NodeMetricRollup.bucket_start)).filter(
+            NodeMetricRollup.resolution == source
+        ).scalar()
+
+    @classmethod
+    def refresh_rollups(cls, now: datetime = None):
+        """Roll up everything since each resolution's watermark, plus the
+        last METRICS_ROLLUP_LOOKBACK_SECONDS again for late-flushed heartbeats.
+
+        Without a watermark (first run) existing history within the rollup's
+        retention is backfilled, and a gap left by downtime or a failed pass
+        is filled on the next run. Work is committed every
+        METRICS_ROLLUP_BACKFILL_CHUNK_HOURS with the watermark, so a long
+        backfill resumes where it stopped. Buckets are upserted, so
+        recomputing an overlapping window is safe.
+        """
+        now = now or datetime.now()
+        lookback = timedelta(seconds=Config.METRICS_ROLLUP_LOOKBACK_SECONDS)
+        chunk = timedelta(hours=Config.METRICS_ROLLUP_BACKFILL_CHUNK_HOURS)
+        watermarks = cls.rollup_watermarks()
+
+        for resolution, (width, source) in ROLLUP_RESOLUTIONS.items():
+            # Buckets before the current one are complete, and a coarser
+            # rollup is complete no further than its source
+            complete = bucket_floor(now, width)
+            if source != 'raw':
+                if watermarks.get(source) is None:
+                    continue
+                complete = min(complete, bucket_floor(watermarks[source], width))
+
+            recent = bucket_floor(now - lookback - width, width)
+            retention = bucket_floor(now - timedelta(days=Config.METRICS_ROLLUP_RETENTION_DAYS[resolution]), width)
+            mark = watermarks.get(resolution)
+            if mark is None:
+                oldest = cls._oldest_source(resolution, source)
+                since = max(bucket_floor(oldest, width), retention) if oldest else recent
+            else:
+                since = max(min(mark, recent), retention)
+
+            while since < now:
+                until = min(since + chunk, now + width)
+                cls._roll_up(resolution, width, source, since, until)
+                done = min(until, complete)
+                mark = done if mark is None else max(mark, done)
+                cls._set_watermark(resolution, mark)
+                db.session.commit()
+                since = until
+            watermarks[resolution] = mark
+
+    @staticmethod
+    def _roll_up(resolution: str, width: timedelta, source: str, since: datetime, until: datetime):
+        """Upsert the ``resolution`` buckets starting in [since, until)"""
+        rollups = NodeMetricRollup.__tablename__
+        metrics = NodeMetricRollup.METRICS
+        step = f"{int(width.total_seconds())} seconds"
+
+        if source == 'raw':
+            aggregates = ", ".join(f"avg({m}), max({m})" for m in metrics)
+            select = (
+                f"SELECT node_id, :resolution, date_bin(CAST(:step AS interval), recorded_at, {_ORIGIN}) AS bucket, "
+                f"count(*), {aggregates} "
+                f"FROM {NodeMetric.__tablename__} "
+                f"WHERE recorded_at >= :since AND recorded_at < :until AND node_id IS NOT NULL "
+                f"GROUP BY node_id, bucket"
+            )
+        else:
+            # Sample-weighted average of the finer buckets
+            aggregates = ", ".join(
+                f"sum({m}_avg * samples) / NULLIF(sum(samples), 0), max({m}_max)" for m in metrics
+            )
+            select = (
+                f"SELECT node_id, :resolution, date_bin(CAST(:step AS interval), bucket_start, {_ORIGIN}) AS bucket, "
+                f"sum(samples), {aggregates} "
+                f"FROM {rollups} "
+                f"WHERE resolution = :source AND bucket_start >= :since AND bucket_start < :until "
+                f"GROUP BY node_id, bucket"
+            )
+
+        columns = ", ".join(f"{m}_avg, {m}_max" for m in metrics)
+        updates = ", ".join(
+            f"{c} = EXCLUDED.{c}" for m in metrics for c in (f"{m}_avg", f"{m}_max")
+        )
+        db.session.execute(text(
+            f"INSERT INTO {rollups} (node_id, resolution, bucket_start, samples, {columns}) "
+            f"{select} "
+            f"ON CONFLICT (node_id, resolution, bucket_start) DO UPDATE SET "
+            f"samples = EXCLUDED.samples, {updates}"
+        ), {"resolution": resolution, "source": source, "step": step, "since": since, "until": until})
+
+    @staticmethod
+    def _set_watermark(resolution: str, rolled_up_to: datetime):
+        stmt = pg_insert(NodeMetricRollupWatermark).values(resolution=resolution, rolled_up_to=rolled_up_to)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[NodeMetricRollupWatermark.resolution],
+            set_={'rolled_up_to': stmt.excluded.rolled_up_to},
+        ))
+
+    @staticmethod
+    def prune_rollups(now: datetime = None) -> int:
+        """Delete rollup buckets past their per-resolution retention"""
+        now = now or datetime.now()
+        deleted = 0
+        for resolution, days in Config.METRICS_ROLLUP_RETENTION_DAYS.items():
+            deleted += NodeMetricRollup.query.filter(
+                NodeMetricRollup.resolution == resolution,
+                NodeMetricRollup.bucket_start < now - timedelta(days=days)
+            ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    @classmethod
+    def run(cls):
+        """One maintenance pass, called periodically"""
+        cls.ensure_partitions()
+        cls.refresh_rollups()
+        cls.drop_expired_partitions()
+        cls.prune_rollups()
@@ -0,0 +1,257 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import Config
+from utils.payload import compact_node
+
+logger = logging.getLogger(__name__)
+
+
+class NodeEvent(NamedTuple):
+    # Cluster-wide sequence number, sent as the SSE id; None for events
+    # generated by this worker (node removals)
+    seq: Optional[int]
+    # Last sequence number seen when the event was produced
+    cursor: int
+    name: str
+    data: str
+
+    def encode(self) -> str:
+        head = f"id: {self.seq}\n" if self.seq is not None else ""
+        return f"{head}event: {self.name}\ndata: {self.data}\n\n"
+
+
+def snapshot_event(nodes: List[dict], last_seq: int) -> NodeEvent:
+    """Full compact node list for a client that has nothing (or too little) to resume from"""
+    return NodeEvent(last_seq or None, last_seq, 'snapshot', json.dumps([compact_node(n) for n in nodes], default=str))
+
+
+class StreamFilter:
+    """
+    Narrows one client's stream to the nodes ``matches`` accepts (a
+    profile's available nodes, say). Nodes that stop matching are sent as
+    'remove' so the client's list stays exact.
+    """
+
+    def __init__(self, matches: Callable[[dict], bool]):
+        self.matches = matches
+        # Hostnames the client currently shows; None after a resume, when
+        # that is unknown and every non-matching node is removed
+        self._visible: Optional[set] = None
+
+    def snapshot(self, nodes: List[dict], last_seq: int) -> NodeEvent:
+        nodes = [n for n in nodes if self.matches(n)]
+        self._visible = {n.get('hostname') for n in nodes}
+        return snapshot_event(nodes, last_seq)
+
+    def apply(self, event: NodeEvent) -> Optional[NodeEvent]:
+        """The event as this client should see it, or None to skip it"""
+        if event.name == 'node':
+            node = json.loads(event.data)
+            hostname = node.get('hostname')
+            if self.matches(node):
+                if self._visible is not None:
+                    self._visible.add(hostname)
+                return event
+            if self._visible is not None and hostname not in self._visible:
+                return None
+            if self._visible is not None:
+                self._visible.discard(hostname)
+            return NodeEvent(event.seq, event.cursor, 'remove', json.dumps({"hostname": hostname}))
+
+        if event.name == 'remove' and self._visible is not None:
+            hostname = json.loads(event.data).get('hostname')
+            if hostname not in self._visible:
+                return None
+            self._visible.discard(hostname)
+        return event
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class Subscription:
+    """One stream client; ``queue`` is a queue.Queue or, for the async app, an asyncio.Queue"""
+
+    def __init__(self, q, loop=None):
+        self.queue = q
+        self.loop = loop
+        self.closed = False
+
+    def offer(self, event: NodeEvent) -> bool:
+        """Hand an event to the client without blocking; False if it cannot keep up"""
+        if self.loop is not None:
+            if self.queue.full():
+                return False
+            self.loop.call_soon_threadsafe(self._put_nowait, event)
+            return True
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def _put_nowait(self, event: NodeEvent):
+        # Runs on the client's event loop
+        try:
+            self.queue.put_nowait(event)
+        except Exception:
+            self.closed = True
+
+
+class NodeEventHub:
+    """
+    Per-worker fan-out of node heartbeats to /nodes/stream clients.
+
+    One thread per worker subscribes to RedisService.NODE_EVENTS_CHANNEL and
+    forwards each node whose compact view changed to every client, so the
+    cost of a heartbeat is one Redis message per worker whatever the number
+    of open streams. The last NODE_STREAM_BUFFER events are kept in a ring
+    so a client reconnecting with Last-Event-ID gets what it missed; events
+    carry the cluster-wide sequence from the heartbeat script, so this works
+    across workers. Slow clients are disconnected and resume the same way.
+    """
+
+    def __init__(self, redis_service=None):
+        self._redis = redis_service
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._ring = deque(maxlen=Config.NODE_STREAM_BUFFER)
+        # Events up to this sequence number may be missing from the ring
+        self._floor: Optional[int] = None
+        self._last_seq = 0
+        # hostname -> (compact view, monotonic time of last heartbeat)
+        self._nodes: Dict[str, Tuple[dict, float]] = {}
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def init_app(self, app, redis_service=None):
+        """Start the subscriber thread for this worker"""
+        if self.running:
+            return
+        if redis_service is not None:
+            self._redis = redis_service
+        self._thread = threading.Thread(target=self._listen_loop, name="node-events", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, last_event_id: Optional[int] = None,
+                  loop=None) -> Tuple[Subscription, Optional[List[NodeEvent]]]:
+        """Register a client.
+
+        Returns the subscription and the events to replay after
+        ``last_event_id``, or None when they are no longer buffered and the
+        client needs a full snapshot instead.
+        """
+        if loop is not None:
+            import asyncio
+            q = asyncio.Queue(maxsize=Config.NODE_STREAM_QUEUE_MAX)
+        else:
+            q = queue.Queue(maxsize=Config.NODE_STREAM_QUEUE_MAX)
+        subscription = Subscription(q, loop)
+
+        with self._lock:
+            backlog = None
+            if last_event_id is not None and self._floor is not None and last_event_id >= self._floor:
+                backlog = [
+                    e for e in self._ring
+                    if (e.seq if e.seq is not None else e.cursor + 1) > last_event_id
+                ]
+            self._subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "subscribers": len(self._subscribers),
+            "buffered": len(self._ring),
+            "last_seq": self._last_seq,
+        }
+
+    def _broadcast(self, event: NodeEvent):
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                evicted = self._ring[0]
+                self._floor = max(self._floor or 0, evicted.seq if evicted.seq is not None else evicted.cursor)
+            self._ring.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            if not subscription.offer(event):
+                # Too far behind; closing makes it reconnect with Last-Event-ID
+                self.unsubscribe(subscription)
+
+    def _handle(self, raw: str):
+        message = json.loads(raw)
+        seq, node = int(message['seq']), message['node']
+        hostname = node.get('hostname')
+        if not hostname:
+            return
+
+        if self._floor is None:
+            self._floor = seq - 1
+        self._last_seq = max(self._last_seq, seq)
+
+        view = compact_node(node)
+        previous = self._nodes.get(hostname)
+        self._nodes[hostname] = (view, time.monotonic())
+        if previous is not None and previous[0] == view:
+            return
+
+        self._broadcast(NodeEvent(seq, seq, 'node', json.dumps(view, default=str)))
+
+    def _expire_nodes(self):
+        """Announce nodes whose heartbeats stopped"""
+        cutoff = time.monotonic() - Config.REDIS_EXPIRE_SECONDS
+        for hostname, (_, seen) in list(self._nodes.items()):
+            if seen < cutoff:
+                del self._nodes[hostname]
+                self._broadcast(NodeEvent(None, self._last_seq, 'remove', json.dumps({"hostname": hostname})))
+
+    def _listen_loop(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.subscribe_node_events()
+                # Messages published while unsubscribed are lost: restart the
+                # ring so clients that missed them get a snapshot
+                with self._lock:
+                    self._ring.clear()
+                    self._floor = None
+                next_expiry = time.monotonic() + Config.NODE_STREAM_KEEPALIVE
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self._handle(message['data'])
+                    if time.monotonic() >= next_expiry:
+                        self._expire_nodes()
+                        next_expiry = time.monotonic() + Config.NODE_STREAM_KEEPALIVE
+            except Exception as e:
+                logger.error(f"Node stream listener failed, resubscribing: {e}")
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+
+node_events = NodeEventHub()
@@ -1,18 +1,248 @@
 import json
 import logging
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
-from sqlalchemy import and_
-from models import db, Node, NodeMetric
+from typing import FrozenSet, Iterator, List, Dict, Optional, Tuple
+from sqlalchemy import and_, cast, func, literal, literal_column, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import INTERVAL
+from models import db, Node, NodeMetric, NodeMetricRollup
+from services.metrics_maintenance import ROLLUP_RESOLUTIONS, MetricsMaintenance, bucket_floor
+from services.cluster_snapshot import ClusterSnapshotStore
+from services.metric_writer import Heartbeat, invalid_node_fields, metric_writer, missing_node_fields, persist_heartbeats
+from services.profile_cache import profile_cache
+from services.profile_index import node_matches_profile, profile_index
 from services.redis_service import RedisService
-from utils.scoring import calculate_node_score
+from utils.bin_packing import demand_for_profile
+from utils.gpu import apply_gpu_placement, pick_gpu
+from utils.load_balancer import (
+    BIN_PACKING,
+    get_round_robin_counter,
+    reservation_candidates,
+    resolve_algorithm,
+    select_nodes_by_algorithm,
+)
+from utils.scoring import calculate_node_score, node_load_score
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+DOWNSAMPLE_AGGREGATES = ('avg', 'max', 'p95')
+
+# Columns of /metrics/export rows, in keyset order first
+EXPORT_COLUMNS = (
+    NodeMetric.node_id,
+    Node.hostname,
+    NodeMetric.recorded_at,
+    NodeMetric.id,
+    NodeMetric.cpu_usage_percent,
+    NodeMetric.memory_usage_percent,
+    NodeMetric.disk_usage_percent,
+    NodeMetric.active_jupyterlab,
+    NodeMetric.active_ray,
+    NodeMetric.total_containers,
+    NodeMetric.load_score,
+)
+
+# The helpers below are free of session and Redis I/O so the sync and
+# async (services/async_node_service.py) services share them.
+
+def node_within_profile_usage(node_dict: dict, profile: dict) -> bool:
+    """Check node usage against the profile's dynamic thresholds"""
+    if profile['max_cpu_usage'] is not None and node_dict.get('cpu_usage_percent', 100) > profile['max_cpu_usage']:
+        return False
+    if profile['max_memory_usage'] is not None and node_dict.get('memory_usage_percent', 100) > profile['max_memory_usage']:
+        return False
+
+    return True
+
+def filter_available_nodes(nodes: List[Dict], profile: Optional[dict] = None,
+                           eligible: Optional[FrozenSet[str]] = None,
+                           strict_filter: bool = False) -> List[Dict]:
+    """Nodes fit for new work, sorted by load score.
+
+    ``profile`` holds profile criteria; ``eligible`` is its precomputed set
+    from the eligibility index, otherwise static criteria are checked here.
+    """
+    if profile:
+        nodes = [
+            n for n in nodes
+            if (n.get('hostname') in eligible if eligible is not None else node_matches_profile(profile, n))
+            and node_within_profile_usage(n, profile)
+        ]
+
+    # Apply usage filters
+    if strict_filter:
+        max_cpu = Config.STRICT_MAX_CPU_USAGE
+        max_memory = Config.STRICT_MAX_MEMORY_USAGE
+        max_containers = Config.STRICT_MAX_CONTAINERS
+    else:
+        max_cpu = Config.DEFAULT_MAX_CPU_USAGE
+        max_memory = Config.DEFAULT_MAX_MEMORY_USAGE
+        max_containers = None
+
+    filtered = []
+    for node in nodes:
+
+        cpu_usage = node.get('cpu_usage_percent')
+        if cpu_usage is None or cpu_usage >= max_cpu:
+            continue
+
+        memory_usage = node.get('memory_usage_percent')
+        if memory_usage is None or memory_usage >= max_memory:
+            continue
+
+        if max_containers and node.get('total_containers', 0) >= max_containers:
+            continue
+
+        # Add load score (snapshot nodes carry it precomputed)
+        if 'load_score' not in node:
+            node['load_score'] = calculate_node_score(node)
+        filtered.append(node)
+
+    # Sort by load score
+    filtered.sort(key=lambda x: x['load_score'])
+    return filtered
+
+def apply_reservations(nodes: List[Dict], reservations: Dict[str, int]) -> List[Dict]:
+    """Fold live capacity reservations into each node's container count and load score"""
+    for node in nodes:
+        reserved = reservations.get(node.get('hostname'), 0)
+        node['reserved_containers'] = reserved
+        if reserved:
+            if 'load_score' not in node:
+                node['load_score'] = calculate_node_score(node)
+            node['total_containers'] = (node.get('total_containers') or 0) + reserved
+            node['load_score'] = round(node['load_score'] + reserved * Config.RESERVATION_LOAD_PENALTY, 2)
+    return nodes
+
+def reserved_selection(candidates: List[Dict], picks: List[Tuple[int, int]]) -> List[Dict]:
+    """Candidates picked by the reserve script, with their reservations applied.
+
+    A node reserved several times before its next heartbeat hands out its
+    GPUs in turn rather than the same best device to every selection.
+    """
+    selected = []
+    for index, reserved in picks:
+        node = dict(candidates[index])
+        if node.get('gpu_device'):
+            node['gpu_device'] = pick_gpu(node.get('gpu_info'), skip=reserved - 1)
+        selected.append(apply_reservations([node], {node['hostname']: reserved})[0])
+    return selected
+
+def clamp_node_count(profile: dict, num_nodes: Optional[int]) -> int:
+    """Number of nodes to select for a profile request"""
+    if num_nodes is None:
+        return profile['min_nodes']
+    return max(profile['min_nodes'], min(num_nodes, profile['max_nodes']))
+
+def rollup_for(step: int, agg: str, since: datetime, now: datetime,
+               watermarks: Dict[str, datetime]) -> Optional[str]:
+    """Coarsest rollup whose buckets tile ``step``, whose retention covers
+    ``since`` and that is rolled up past ``since`` (see MetricsMaintenance.rollup_watermarks)"""
+    if agg not in ('avg', 'max'):
+        return None
+    for resolution in reversed(list(ROLLUP_RESOLUTIONS)):
+        width = ROLLUP_RESOLUTIONS[resolution][0]
+        retention = timedelta(days=Config.METRICS_ROLLUP_RETENTION_DAYS[resolution])
+        mark = watermarks.get(resolution)
+        if (step % int(width.total_seconds()) == 0 and since >= now - retention
+                and mark is not None and bucket_floor(mark, timedelta(seconds=step)) > since):
+            return resolution
+    return None
+
+def downsample_statement(node_id: int, hours: int, step: int, agg: str,
+                         watermarks: Optional[Dict[str, datetime]] = None):
+    """(source, SELECT) bucketing a node's metrics into ``step``-second buckets.
+
+    avg/max read complete rollup buckets up to the rollup's watermark and raw
+    rows after it, so ranges not rolled up yet (the newest buckets, or all
+    of them before the first maintenance pass) still have data.
+    """
+    if agg not in DOWNSAMPLE_AGGREGATES:
+        raise ValueError(f"Unknown agg '{agg}', expected one of {', '.join(DOWNSAMPLE_AGGREGATES)}")
+    if step <= 0:
+        raise ValueError("step must be a positive number of seconds")
+
+    now = datetime.now()
+    since = now - timedelta(hours=hours)
+    resolution = rollup_for(step, agg, since, now, watermarks or {})
+    step_interval = cast(literal(f"{step} seconds"), INTERVAL)
+    origin = literal_column("TIMESTAMP '2000-01-01'")
+    metrics = NodeMetricRollup.METRICS
+
+    raw_since = since
+    parts = []
+    if resolution:
+        # Whole step buckets only, so no bucket is split between the sources
+        raw_since = bucket_floor(watermarks[resolution], timedelta(seconds=step))
+        bucket = func.date_bin(step_interval, NodeMetricRollup.bucket_start, origin).label('bucket')
+        if agg == 'avg':
+            columns = [
+                (func.sum(getattr(NodeMetricRollup, f'{m}_avg') * NodeMetricRollup.samples)
+                 / func.nullif(func.sum(NodeMetricRollup.samples), 0)).label(m)
+                for m in metrics
+            ]
+        else:
+            columns = [func.max(getattr(NodeMetricRollup, f'{m}_max')).label(m) for m in metrics]
+        parts.append(select(bucket, *columns).where(
+            NodeMetricRollup.node_id == node_id,
+            NodeMetricRollup.resolution == resolution,
+            NodeMetricRollup.bucket_start >= since,
+            NodeMetricRollup.bucket_start < raw_since
+        ).group_by(bucket))
+
+    bucket = func.date_bin(step_interval, NodeMetric.recorded_at, origin).label('bucket')
+    if agg == 'avg':
+        columns = [func.avg(getattr(NodeMetric, m)).label(m) for m in metrics]
+    elif agg == 'max':
+        columns = [func.max(getattr(NodeMetric, m)).label(m) for m in metrics]
+    else:
+        columns = [func.percentile_cont(0.95).within_group(getattr(NodeMetric, m)).label(m) for m in metrics]
+    parts.append(select(bucket, *columns).where(
+        NodeMetric.node_id == node_id,
+        NodeMetric.recorded_at >= raw_since
+    ).group_by(bucket))
+
+    if len(parts) == 1:
+        return 'raw', parts[0].order_by(bucket)
+    combined = union_all(*parts).subquery()
+    return f'rollup_{resolution}+raw', select(combined).order_by(combined.c.bucket)
+
+def downsample_payload(source: str, rows) -> Dict:
+    """Columnar payload: one ``timestamps`` array plus one value array per metric"""
+    return {
+        'source': source,
+        'timestamps': [row[0] for row in rows],
+        'series': {
+            m: [round(row[i + 1], 2) if row[i + 1] is not None else None for row in rows]
+            for i, m in enumerate(NodeMetricRollup.METRICS)
+        },
+    }
+
+def export_statement(since: datetime, until: datetime, hostname: Optional[str],
+                     page_size: int, last_key: Optional[tuple] = None):
+    """One keyset page of /metrics/export rows, after ``last_key`` (node_id, recorded_at, id)"""
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .join(Node, Node.id == NodeMetric.node_id)
+        .where(NodeMetric.recorded_at >= since, NodeMetric.recorded_at < until)
+        .order_by(NodeMetric.node_id, NodeMetric.recorded_at, NodeMetric.id)
+        .limit(page_size)
+    )
+    if hostname:
+        stmt = stmt.where(Node.hostname == hostname)
+    if last_key is not None:
+        stmt = stmt.where(
+            tuple_(NodeMetric.node_id, NodeMetric.recorded_at, NodeMetric.id) > tuple_(*last_key)
+        )
+    return stmt
+
 class NodeService:
     def __init__(self, redis_service: RedisService):
         self.redis = redis_service
+        self.snapshot = None
+        if Config.CLUSTER_SNAPSHOT_ENABLED:
+            self.snapshot = ClusterSnapshotStore(self.load_all_nodes, redis_service)
 
     def register_node(self, node_data: dict) -> Tuple[bool, str]:
         """Register or update a node in both Redis and PostgreSQL"""
@@ -20,148 +250,174 @@ class NodeService:
         if not hostname:
             return False, "Hostname is required"
 
+        # Reject bad values before they reach Redis, the snapshot or the
+        # queued batch they would make fail
+        invalid = invalid_node_fields(node_data)
+        if invalid:
+            return False, f"Invalid values for: {', '.join(invalid)}"
+
         try:
-            # Store in Redis for real-time data
-            self.redis.set_node_info(hostname, node_data)
-
-            # Update or create in PostgreSQL
-            node = Node.query.filter_by(hostname=hostname).first()
-            if not node:
-                node = Node(hostname=hostname)
-                db.session.add(node)
-
-            # Update static information
-            node.ip = node_data.get('ip', node.ip)
-            # node.cpu = node_data.get('cpu', node.cpu)
-            node.cpu_cores = node_data.get('cpu_cores', node.cpu_cores)
-            node.ram_gb = node_data.get('ram_gb', node.ram_gb)
-            node.has_gpu = node_data.get('has_gpu', node.has_gpu)
-            node.gpu = node_data.get('gpu', [])
-            node.is_active = True
-            node.updated_at = datetime.now()
-
-            # Save metric history
-            metric = NodeMetric(
-                node_id=node.id if node.id else None,
-                cpu_usage_percent=node_data.get('cpu_usage_percent', 0),
-                memory_usage_percent=node_data.get('memory_usage_percent', 0),
-                disk_usage_percent=node_data.get('disk_usage_percent', 0),
-                active_jupyterlab=node_data.get('active_jupyterlab', 0),
-                active_ray=node_data.get('active_ray', 0),
-                total_containers=node_data.get('total_containers', 0),
-                load_score=calculate_node_score(node_data)
-            )
+            # A new node needs its NOT NULL columns
+            missing = missing_node_fields(node_data)
+            if missing and not db.session.query(Node.id).filter_by(hostname=hostname).scalar():
+                return False, f"Missing required fields for new node: {', '.join(missing)}"
 
-            if node.id:
-                metric.node_id = node.id
-                db.session.add(metric)
+            load_score = calculate_node_score(node_data)
 
-            db.session.commit()
+            # Store in Redis for real-time data
+            self.redis.set_node_info(hostname, node_data, load_score=load_score)
+            profile_index.update_node({**node_data, 'hostname': hostname})
+            if self.snapshot is not None:
+                self.snapshot.apply_heartbeat({**node_data, 'hostname': hostname})
 
-            # If node is new, add metric after getting node ID
-            if not metric.node_id:
-                metric.node_id = node.id
-                db.session.add(metric)
-                db.session.commit()
+            # Node upsert and metric history go through the write-behind queue;
+            # write synchronously when it is disabled or full
+            heartbeat = Heartbeat(hostname, node_data, load_score, datetime.now())
+            if not (metric_writer.running and metric_writer.submit(heartbeat)):
+                persist_heartbeats([heartbeat])
 
             return True, "Node registered successfully"
 
         except Exception as e:
-            db.session.rollback()
             logger.error(f"Error registering node: {e}")
             return False, str(e)
 
     def get_all_nodes(self, include_inactive: bool = False) -> List[Dict]:
-        """Get all nodes with current metrics from Redis"""
-        nodes = Node.query.all()
+        """Get all nodes with current metrics, from the in-memory snapshot when enabled"""
+        if self.snapshot is not None:
+            return self.snapshot.get_nodes(include_inactive=include_inactive)
+        return self.load_all_nodes(include_inactive=include_inactive)
+
+    def load_all_nodes(self, include_inactive: bool = True) -> List[Dict]:
+        """Read all nodes from PostgreSQL with current metrics from Redis"""
+        query = Node.query
         if not include_inactive:
-            nodes = [n for n in nodes if n.is_active]
+            query = query.filter(Node.is_active.is_(True))
+        nodes = query.all()
+
+        # Current metrics for every node in one batched Redis read
+        redis_data = self.redis.get_nodes_info(
+            [node.hostname for node in nodes],
+            fields=Node.REDIS_METRIC_FIELDS
+        )
+        ewma = self.redis.get_nodes_ewma([node.hostname for node in nodes])
 
         result = []
         for node in nodes:
-            # Get current metrics from Redis
-            redis_data = self.redis.get_node_info(node.hostname)
-            if redis_data:
-                node.update_current_metrics(redis_data)
-            result.append(node.to_dict())
+            if node.hostname in redis_data:
+                node.update_current_metrics(redis_data[node.hostname])
+            node_dict = {**node.to_dict(), **ewma.get(node.hostname, {})}
+            node_dict['load_score'] = node_load_score(node_dict)
+            result.append(node_dict)
 
+        profile_index.sync_nodes(result, complete=include_inactive)
         return result
 
     def get_available_nodes(self, profile_id: Optional[int] = None,
-                        strict_filter: bool = False) -> List[Dict]:
-        """Get available nodes based on criteria"""
+                        strict_filter: bool = False,
+                        include_reservations: bool = True) -> List[Dict]:
+        """Get available nodes based on criteria.
+
+        Live capacity reservations count towards each node's containers and
+        load score unless ``include_reservations`` is False.
+        """
         nodes = self.get_all_nodes()
+        if include_reservations:
+            apply_reservations(nodes, self.redis.get_reservations())
 
-        # Filter by profile if provided
+        # Static criteria come from the eligibility index, only usage
+        # thresholds are checked per node
+        profile = eligible = None
         if profile_id:
-            from models import Profile
-            profile = Profile.query.get(profile_id)
+            profile = profile_index.get_profile(profile_id)
             if profile:
-                nodes = [n for n in nodes if self._node_matches_profile(n, profile)]
-
-        # Apply usage filters
-        if strict_filter:
-            max_cpu = Config.STRICT_MAX_CPU_USAGE
-            max_memory = Config.STRICT_MAX_MEMORY_USAGE
-            max_containers = Config.STRICT_MAX_CONTAINERS
-        else:
-            max_cpu = Config.DEFAULT_MAX_CPU_USAGE
-            max_memory = Config.DEFAULT_MAX_MEMORY_USAGE
-            max_containers = None
-
-        filtered = []
-        for node in nodes:
-            
-            cpu_usage = node.get('cpu_usage_percent')
-            if cpu_usage is None or cpu_usage >= max_cpu:
-                continue
-                
-            memory_usage = node.get('memory_usage_percent')
-            if memory_usage is None or memory_usage >= max_memory:
-                continue
-                        
-            if max_containers and node.get('total_containers', 0) >= max_containers:
-                continue
-
-            # Add load score
-            node['load_score'] = calculate_node_score(node)
-            filtered.append(node)
+                eligible = profile_index.eligible(profile_id)
 
-        # Sort by load score
-        filtered.sort(key=lambda x: x['load_score'])
-        return filtered
+        return filter_available_nodes(nodes, profile, eligible, strict_filter)
 
-    def select_nodes_for_profile(self, profile_id: int,
-                               num_nodes: Optional[int] = None,
-                               user_id: Optional[str] = None) -> List[Dict]:
-        """Select best nodes for a given profile"""
-        from models import Profile, NodeSelection
+    def preview_nodes_for_profile(self, profile_id: int,
+                                  num_nodes: Optional[int] = None,
+                                  algorithm: Optional[str] = None) -> List[Dict]:
+        """Nodes select_nodes_for_profile would pick right now, without recording anything.
 
-        profile = Profile.query.get(profile_id)
+        Round robin shows the next positions without advancing the counter;
+        random and power_of_two show one possible pick.
+        """
+        profile = profile_cache.get(profile_id)
         if not profile:
             raise ValueError(f"Profile {profile_id} not found")
 
+        algorithm = resolve_algorithm(algorithm, profile, Config.SELECTION_ALGORITHM)
+
         # Determine number of nodes to select
-        if num_nodes is None:
-            num_nodes = profile.min_nodes
-        else:
-            num_nodes = max(profile.min_nodes, min(num_nodes, profile.max_nodes))
+        num_nodes = clamp_node_count(profile, num_nodes)
 
         # Get available nodes matching profile
         available = self.get_available_nodes(profile_id=profile_id)
+        if profile.get('gpu_required'):
+            available = apply_gpu_placement(available)
 
         if len(available) < num_nodes:
             raise ValueError(f"Not enough nodes available. Required: {num_nodes}, Available: {len(available)}")
 
-        # Select best nodes
-        selected = available[:num_nodes]
+        start = get_round_robin_counter() if algorithm == 'round_robin' else None
+        selected = select_nodes_by_algorithm(
+            available, algorithm, num_nodes, round_robin_start=start, demand=demand_for_profile(profile)
+        )
+        if len(selected) < num_nodes:
+            raise ValueError(f"Not enough nodes with free capacity. Required: {num_nodes}")
+        return selected
+
+    def select_nodes_for_profile(self, profile_id: int,
+                               num_nodes: Optional[int] = None,
+                               user_id: Optional[str] = None,
+                               algorithm: Optional[str] = None) -> List[Dict]:
+        """Select best nodes for a given profile.
+
+        ``algorithm`` overrides the profile's selection_algorithm. The pick
+        is made by a Redis script that reserves capacity on the chosen nodes
+        in the same step, so concurrent selections spread out instead of
+        all landing on the node that looked least loaded.
+        """
+        from models import NodeSelection
+
+        profile = profile_cache.get(profile_id)
+        if not profile:
+            raise ValueError(f"Profile {profile_id} not found")
+
+        algorithm = resolve_algorithm(algorithm, profile, Config.SELECTION_ALGORITHM)
+        num_nodes = clamp_node_count(profile, num_nodes)
+
+        # Raw metrics; the script adds the reservations it sees
+        available = self.get_available_nodes(profile_id=profile_id, include_reservations=False)
+        if profile.get('gpu_required'):
+            available = apply_gpu_placement(available)
+        if len(available) < num_nodes:
+            raise ValueError(f"Not enough nodes available. Required: {num_nodes}, Available: {len(available)}")
+
+        demand = demand_for_profile(profile)
+        candidates, rank = reservation_candidates(
+            available, algorithm, num_nodes, Config.RESERVATION_CANDIDATES, demand=demand
+        )
+        # Bin packing fits on cores and memory, so reservations must use them up too
+        picks = self.redis.reserve_nodes(
+            candidates, num_nodes, uuid.uuid4().hex, rank,
+            demand=demand if algorithm in BIN_PACKING else None
+        )
+        if picks is None:
+            # Redis unavailable: fall back to the unreserved pick
+            selected = candidates[:num_nodes]
+        else:
+            selected = reserved_selection(candidates, picks)
+        if len(selected) < num_nodes:
+            raise ValueError(f"Not enough nodes with free capacity. Required: {num_nodes}")
 
         # Record selection
         selection = NodeSelection(
             profile_id=profile_id,
             user_id=user_id,
             selected_nodes=[{'id': n.get('id'), 'hostname': n.get('hostname')} for n in selected],
-            selection_reason='profile_based'
+            selection_reason=f'profile_based:{algorithm}'
         )
         db.session.add(selection)
         db.session.commit()
@@ -170,16 +426,19 @@ class NodeService:
 
     def get_node_by_hostname(self, hostname: str) -> Optional[Dict]:
         """Get specific node by hostname"""
+        if self.snapshot is not None:
+            return self.snapshot.get_node(hostname)
+
         node = Node.query.filter_by(hostname=hostname).first()
         if not node:
             return None
 
         # Get current metrics from Redis
-        redis_data = self.redis.get_node_info(hostname)
+        redis_data = self.redis.get_node_info(hostname, fields=Node.REDIS_METRIC_FIELDS)
         if redis_data:
             node.update_current_metrics(redis_data)
 
-        return node.to_dict()
+        return {**node.to_dict(), **self.redis.get_nodes_ewma([hostname]).get(hostname, {})}
 
     def get_node_metrics_history(self, hostname: str, hours: int = 24) -> List[Dict]:
         """Get historical metrics for a node"""
@@ -197,6 +456,46 @@ class NodeService:
 
         return [m.to_dict() for m in metrics]
 
+    def get_node_metrics_downsampled(self, hostname: str, hours: int = 24,
+                                     step: int = 300, agg: str = 'avg') -> Optional[Dict]:
+        """Get node metrics bucketed in SQL into ``step``-second buckets.
+
+        Returns a columnar payload: one ``timestamps`` array plus one value
+        array per metric. avg/max are served from the coarsest rollup that
+        fits the step and range, up to its watermark, and from raw rows
+        after it; p95 needs raw samples.
+        """
+        node_id = db.session.query(Node.id).filter_by(hostname=hostname).scalar()
+        if node_id is None:
+            return None
+
+        source, stmt = downsample_statement(node_id, hours, step, agg, MetricsMaintenance.rollup_watermarks())
+        return downsample_payload(source, db.session.execute(stmt).all())
+
+    def iter_metrics_export(self, since: datetime, until: datetime,
+                            hostname: Optional[str] = None,
+                            page_size: int = 5000) -> Iterator[Dict]:
+        """Yield NodeMetric rows across nodes in (node_id, recorded_at) order.
+
+        Pages are fetched by keyset on (node_id, recorded_at, id) and each
+        page is streamed through a server-side cursor, so memory stays flat
+        regardless of the exported range.
+        """
+        page_size = max(1, page_size)
+        last_key = None
+        while True:
+            stmt = export_statement(since, until, hostname, page_size, last_key)
+
+            rows = 0
+            result = db.session.execute(stmt.execution_options(yield_per=min(page_size, 1000)))
+            for row in result:
+                rows += 1
+                last_key = (row.node_id, row.recorded_at, row.id)
+                yield row._asdict()
+
+            if rows < page_size:
+                return
+
     def mark_nodes_inactive(self):
         """Mark nodes as inactive if not updated recently"""
         threshold = datetime.now() - timedelta(seconds=Config.REDIS_EXPIRE_SECONDS * 2)
@@ -207,18 +506,3 @@ class NodeService:
             )
         ).update({'is_active': False})
         db.session.commit()
-
-    def _node_matches_profile(self, node_dict: dict, profile) -> bool:
-        """Check if node matches profile requirements"""
-        if profile.cpu_requirement and node_dict.get('cpu_cores', 0) < profile.cpu_requirement:
-            return False
-        if profile.ram_requirement and node_dict.get('ram_gb', 0) < profile.ram_requirement:
-            return False
-        if profile.gpu_required and not node_dict.get('has_gpu', False):
-            return False
-        if profile.max_cpu_usage is not None and node_dict.get('cpu_usage_percent', 100) > profile.max_cpu_usage:
-            return False
-        if profile.max_memory_usage is not None and node_dict.get('memory_usage_percent', 100) > profile.max_memory_usage:
-            return False
-        
-        return True
\ No newline at end of file
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from services.profile_index import profile_index
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel used to tell every worker to drop its cached profiles
+INVALIDATE_CHANNEL = "profiles:invalidate"
+
+
+class ProfileCache:
+    """
+    In-process cache of every profile (as to_dict payloads) with a TTL.
+
+    ProfileService invalidates it on create/update and broadcasts the
+    invalidation on INVALIDATE_CHANNEL so other workers drop theirs too.
+    Each load also refreshes the profile eligibility index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: Optional[Dict[int, dict]] = None
+        self._etags: Dict[bool, str] = {}
+        self._expires_at = 0.0
+        self._redis = None
+        self._thread = None
+
+    def init_app(self, app, redis_service):
+        """Start listening for invalidations from other workers"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._redis = redis_service
+        self._thread = threading.Thread(target=self._listen_loop, name="profile-cache", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> Dict[int, dict]:
+        profiles = self._profiles
+        if profiles is not None and time.monotonic() < self._expires_at:
+            return profiles
+
+        with self._lock:
+            if self._profiles is not None and time.monotonic() < self._expires_at:
+                return self._profiles
+
+            from models import Profile
+            rows = Profile.query.order_by(Profile.id).all()
+            profile_index.set_profiles(rows)
+            profiles = {row.id: row.to_dict() for row in rows}
+
+            self._etags = {}
+            self._profiles = profiles
+            self._expires_at = time.monotonic() + Config.PROFILE_CACHE_TTL
+            return profiles
+
+    def get(self, profile_id: int) -> Optional[dict]:
+        profile = self._load().get(profile_id)
+        return dict(profile) if profile else None
+
+    def get_all(self, active_only: bool = True) -> Tuple[List[dict], str]:
+        """Cached profiles plus an ETag for the serialized list"""
+        profiles = [
+            p for p in self._load().values()
+            if not active_only or p['is_active']
+        ]
+        etag = self._etags.get(active_only)
+        if etag is None:
+            etag = hashlib.sha1(json.dumps(profiles, sort_keys=True, default=str).encode()).hexdigest()
+            self._etags[active_only] = etag
+        return profiles, etag
+
+    def invalidate(self, broadcast: bool = True):
+        """Drop cached profiles here and, with ``broadcast``, in every other worker"""
+        with self._lock:
+            self._profiles = None
+            self._etags = {}
+            self._expires_at = 0.0
+        profile_index.clear_profiles()
+
+        if broadcast and self._redis is not None:
+            self._redis.publish(INVALIDATE_CHANNEL, "invalidate")
+
+    def _listen_loop(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.subscribe(INVALIDATE_CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self.invalidate(broadcast=False)
+            except Exception as e:
+                logger.error(f"Profile invalidation listener failed, resubscribing: {e}")
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,145 @@
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Profile attributes kept by the index: static criteria plus the usage
+# thresholds still checked per request
+PROFILE_FIELDS = (
+    'id', 'cpu_requirement', 'ram_requirement', 'gpu_required',
+    'max_cpu_usage', 'max_memory_usage', 'is_active',
+)
+
+
+def profile_criteria(profile) -> dict:
+    if isinstance(profile, dict):
+        return {f: profile.get(f) for f in PROFILE_FIELDS}
+    return {f: getattr(profile, f) for f in PROFILE_FIELDS}
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _node_static(node: dict) -> tuple:
+    """Static facts as numbers; None for a value that does not parse"""
+    return (_number(node.get('cpu_cores')), _number(node.get('ram_gb')), bool(node.get('has_gpu')))
+
+
+def _matches_static(criteria: dict, static: tuple) -> bool:
+    cpu_cores, ram_gb, has_gpu = static
+    if cpu_cores is None or ram_gb is None:
+        # Unparseable node data matches no profile
+        return False
+    if criteria['cpu_requirement'] and cpu_cores < criteria['cpu_requirement']:
+        return False
+    if criteria['ram_requirement'] and ram_gb < criteria['ram_requirement']:
+        return False
+    if criteria['gpu_required'] and not has_gpu:
+        return False
+    return True
+
+
+def node_matches_profile(criteria: dict, node: dict) -> bool:
+    """Whether a node satisfies a profile's static criteria, without the index"""
+    return _matches_static(criteria, _node_static(node))
+
+
+class ProfileEligibilityIndex:
+    """
+    Maps each profile to the hostnames that satisfy its static criteria
+    (cpu_requirement, ram_requirement, gpu_required).
+
+    Node heartbeats and profile changes update it incrementally: a node is
+    re-evaluated only when its static facts change, a profile only when it
+    is created or updated. Sets are replaced, never mutated, so readers
+    need no lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: Dict[int, dict] = {}
+        self._eligible: Dict[int, FrozenSet[str]] = {}
+        self._nodes: Dict[str, tuple] = {}
+
+    def get_profile(self, profile_id: int) -> Optional[dict]:
+        """Indexed profile criteria, loaded through the profile cache on first use"""
+        profile = self._profiles.get(profile_id)
+        if profile is None:
+            from services.profile_cache import profile_cache
+            cached = profile_cache.get(profile_id)
+            if cached is None:
+                return None
+            profile = self.update_profile(cached)
+        return profile
+
+    def eligible(self, profile_id: int) -> FrozenSet[str]:
+        return self._eligible.get(profile_id, frozenset())
+
+    def set_profiles(self, profiles: Iterable):
+        for profile in profiles:
+            self.update_profile(profile)
+
+    def update_profile(self, profile) -> dict:
+        """(Re)index one profile against every known node"""
+        criteria = profile_criteria(profile)
+        with self._lock:
+            self._profiles[criteria['id']] = criteria
+            self._eligible[criteria['id']] = frozenset(
+                hostname for hostname, static in self._nodes.items()
+                if _matches_static(criteria, static)
+            )
+        return criteria
+
+    def clear_profiles(self):
+        """Forget every profile; they are re-indexed on next use"""
+        with self._lock:
+            self._profiles = {}
+            self._eligible = {}
+
+    def remove_profile(self, profile_id: int):
+        with self._lock:
+            self._profiles.pop(profile_id, None)
+            self._eligible.pop(profile_id, None)
+
+    def update_node(self, node: dict):
+        """Re-evaluate one node across all profiles if its static facts changed"""
+        hostname = node.get('hostname')
+        static = _node_static(node)
+        if not hostname or self._nodes.get(hostname) == static:
+            return
+
+        with self._lock:
+            self._nodes[hostname] = static
+            for profile_id, criteria in self._profiles.items():
+                members = self._eligible.get(profile_id, frozenset())
+                if _matches_static(criteria, static):
+                    if hostname not in members:
+                        self._eligible[profile_id] = members | {hostname}
+                elif hostname in members:
+                    self._eligible[profile_id] = members - {hostname}
+
+    def sync_nodes(self, nodes: Iterable[dict], complete: bool = False):
+        """Apply a batch of nodes; with ``complete`` drop nodes not in the batch"""
+        seen = set()
+        for node in nodes:
+            seen.add(node.get('hostname'))
+            self.update_node(node)
+
+        if complete:
+            for hostname in set(self._nodes) - seen:
+                self.remove_node(hostname)
+
+    def remove_node(self, hostname: str):
+        with self._lock:
+            self._nodes.pop(hostname, None)
+            for profile_id, members in list(self._eligible.items()):
+                if hostname in members:
+                    self._eligible[profile_id] = members - {hostname}
+
+
+profile_index = ProfileEligibilityIndex()
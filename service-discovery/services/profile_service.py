@@ -1,9 +1,15 @@
 from typing import List, Optional
 from models import db, Profile
+from services.profile_cache import profile_cache
+from utils.load_balancer import ALGORITHMS
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _check_algorithm(algorithm: Optional[str]):
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        raise ValueError(f"selection_algorithm must be one of {', '.join(ALGORITHMS)}")
+
 class ProfileService:
 
     @staticmethod
@@ -67,11 +73,52 @@ class ProfileService:
 
         try:
             db.session.commit()
+            profile_cache.invalidate()
             logger.info("Default profiles created successfully")
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error creating default profiles: {e}")
 
+    @staticmethod
+    def create_profile(data: dict) -> Profile:
+        """Create a new profile"""
+        if not data.get('name'):
+            raise ValueError("Profile name is required")
+
+        if Profile.query.filter_by(name=data['name']).first():
+            raise ValueError(f"Profile '{data['name']}' already exists")
+
+        profile_data = {
+            'name': data['name'],
+            'description': data.get('description', ''),
+            'min_nodes': data.get('min_nodes', 1),
+            'max_nodes': data.get('max_nodes', 1),
+            'cpu_requirement': data.get('cpu_requirement'),
+            'ram_requirement': data.get('ram_requirement'),
+            'gpu_required': data.get('gpu_required', False),
+            'max_cpu_usage': data.get('max_cpu_usage', 80.0),
+            'max_memory_usage': data.get('max_memory_usage', 85.0),
+            'priority': data.get('priority', 0),
+            'selection_algorithm': data.get('selection_algorithm'),
+            'is_active': data.get('is_active', True)
+        }
+
+        if profile_data['min_nodes'] > profile_data['max_nodes']:
+            raise ValueError("min_nodes cannot be greater than max_nodes")
+        _check_algorithm(profile_data['selection_algorithm'])
+
+        profile = Profile(**profile_data)
+        db.session.add(profile)
+        try:
+            db.session.commit()
+            profile_cache.invalidate()
+            logger.info(f"Created profile {profile.name}")
+            return profile
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error creating profile {profile_data['name']}: {e}")
+            raise
+
     @staticmethod
     def update_profile(profile_id: int, update_data: dict) -> Profile:
         """Update a profile by ID with allowed fields"""
@@ -82,15 +129,19 @@ class ProfileService:
         allowed_fields = [
             "name", "description", "min_nodes", "max_nodes",
             "cpu_requirement", "ram_requirement", "gpu_required",
-            "max_cpu_usage", "max_memory_usage", "priority", "is_active"
+            "max_cpu_usage", "max_memory_usage", "priority", "selection_algorithm", "is_active"
         ]
 
+        if "selection_algorithm" in update_data:
+            _check_algorithm(update_data["selection_algorithm"])
+
         for field in allowed_fields:
             if field in update_data:
                 setattr(profile, field, update_data[field])
 
         try:
             db.session.commit()
+            profile_cache.invalidate()
             logger.info(f"Updated profile {profile_id}")
             return profile
         except Exception as e:
@@ -0,0 +1,250 @@
+"""Server-side Lua scripts used by RedisService"""
+
+# Heartbeat fragment: drop reservations older than the TTL, then treat each
+# container the node reports beyond its previous heartbeat as one confirmed
+# reservation (oldest first); a node left without reservations leaves the
+# reserved index. Formatted with the KEYS/ARGV indexes of the including
+# script, whose ARGV[1] is the hostname.
+CONFIRM_RESERVATIONS = """
+redis.call('ZREMRANGEBYSCORE', KEYS[{res}], '-inf', '(' .. (tonumber(ARGV[{now}]) - tonumber(ARGV[{ttl}])))
+if ARGV[{containers}] ~= '' then
+    local previous = tonumber(redis.call('GET', KEYS[{count}]))
+    local current = tonumber(ARGV[{containers}])
+    if previous and current > previous then
+        redis.call('ZPOPMIN', KEYS[{res}], current - previous)
+    end
+    redis.call('SET', KEYS[{count}], ARGV[{containers}], 'EX', ARGV[{expire}])
+end
+if redis.call('ZCARD', KEYS[{res}]) == 0 then
+    redis.call('ZREM', KEYS[{index}], ARGV[1])
+end
+""".strip()
+
+# Heartbeat fragment: fold the raw CPU, memory and container figures into
+# per-node exponentially weighted moving averages. The weight of a sample
+# depends on the time since the previous one:
+#   alpha = 1 - exp(-dt * ln 2 / half_life)
+# so a value decays to half its influence after half_life seconds whatever
+# the heartbeat interval. Leaves the averages JSON-encoded in ``ewma`` for
+# the event message. Formatted like CONFIRM_RESERVATIONS.
+UPDATE_EWMA = """
+local ewma = {{}}
+local last = redis.call('HMGET', KEYS[{key}], 'ts', 'cpu_usage_ewma', 'memory_usage_ewma', 'total_containers_ewma')
+local ts = tonumber(ARGV[{now}])
+local alpha = 1
+if last[1] and tonumber(ARGV[{half_life}]) > 0 then
+    local dt = ts - tonumber(last[1])
+    if dt <= 0 then
+        -- Out of order: keep the newer averages
+        alpha = 0
+        ts = tonumber(last[1])
+    else
+        alpha = 1 - math.exp(-dt * math.log(2) / tonumber(ARGV[{half_life}]))
+    end
+end
+local names = {{'cpu_usage_ewma', 'memory_usage_ewma', 'total_containers_ewma'}}
+local raw = {{ARGV[{cpu}], ARGV[{memory}], ARGV[{containers}]}}
+local fields = {{'ts', ts}}
+for i = 1, 3 do
+    local value = tonumber(raw[i])
+    local previous = tonumber(last[i + 1])
+    if value and previous then
+        value = previous + alpha * (value - previous)
+    elseif previous then
+        value = previous
+    end
+    if value then
+        ewma[names[i]] = value
+        table.insert(fields, names[i])
+        table.insert(fields, value)
+    end
+end
+redis.call('HSET', KEYS[{key}], unpack(fields))
+redis.call('EXPIRE', KEYS[{key}], ARGV[{expire}])
+ewma = cjson.encode(ewma)
+""".strip()
+
+# Write one heartbeat atomically: node payload, compatibility IP key,
+# heartbeat index and precomputed load score.
+#
+# KEYS[1] node:{hostname}:info
+# KEYS[2] node:{hostname}:ip
+# KEYS[3] heartbeat index (zset)
+# KEYS[4] load score index (zset)
+# KEYS[5] node events sequence counter
+# KEYS[6] node:{hostname}:reservations (zset)
+# KEYS[7] node:{hostname}:containers
+# KEYS[8] reserved index (zset)
+# KEYS[9] node:{hostname}:ewma (hash)
+# ARGV[1] hostname
+# ARGV[2] payload (JSON)
+# ARGV[3] ip ('' to skip)
+# ARGV[4] expire seconds
+# ARGV[5] heartbeat time (unix)
+# ARGV[6] load score
+# ARGV[7] node events channel; {"seq": <n>, "node": <payload>, "ewma": <averages>}
+#         is published to it
+# ARGV[8] reported container count ('' if unknown)
+# ARGV[9] reservation TTL seconds
+# ARGV[10] EWMA half-life seconds
+# ARGV[11] CPU usage percent ('' if unknown)
+# ARGV[12] memory usage percent ('' if unknown)
+HEARTBEAT = """
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+if ARGV[3] ~= '' then
+    redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[4])
+end
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[1])
+redis.call('ZADD', KEYS[4], ARGV[6], ARGV[1])
+""" + CONFIRM_RESERVATIONS.format(res=6, count=7, index=8, now=5, containers=8, ttl=9, expire=4) + """
+""" + UPDATE_EWMA.format(key=9, now=5, half_life=10, cpu=11, memory=12, containers=8, expire=4) + """
+local seq = redis.call('INCR', KEYS[5])
+redis.call('PUBLISH', ARGV[7], '{"seq":' .. seq .. ',"node":' .. ARGV[2] .. ',"ewma":' .. ewma .. '}')
+return seq
+"""
+
+# Remove nodes whose last heartbeat is older than the cutoff from both
+# indexes. Returns the number of pruned hostnames.
+#
+# KEYS[1] heartbeat index (zset)
+# KEYS[2] load score index (zset)
+# ARGV[1] cutoff (unix, exclusive)
+PRUNE_STALE = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+for i = 1, #stale, 500 do
+    local chunk = {unpack(stale, i, math.min(i + 499, #stale))}
+    redis.call('ZREM', KEYS[1], unpack(chunk))
+    redis.call('ZREM', KEYS[2], unpack(chunk))
+end
+return #stale
+"""
+
+# Hash layout variant of HEARTBEAT. Static facts are rewritten only when
+# their digest changes; volatile metrics are updated field by field.
+#
+# KEYS[1] node:{hostname}:static (hash)
+# KEYS[2] node:{hostname}:metrics (hash)
+# KEYS[3] node:{hostname}:ip
+# KEYS[4] heartbeat index (zset)
+# KEYS[5] load score index (zset)
+# KEYS[6] node events sequence counter
+# KEYS[7] node:{hostname}:reservations (zset)
+# KEYS[8] node:{hostname}:containers
+# KEYS[9] reserved index (zset)
+# KEYS[10] node:{hostname}:ewma (hash)
+# ARGV[1] hostname
+# ARGV[2] ip ('' to skip)
+# ARGV[3] expire seconds
+# ARGV[4] heartbeat time (unix)
+# ARGV[5] load score
+# ARGV[6] static digest
+# ARGV[7] node events channel
+# ARGV[8] event payload (JSON), published as {"seq": <n>, "node": <payload>, "ewma": <averages>}
+# ARGV[9] reported container count ('' if unknown)
+# ARGV[10] reservation TTL seconds
+# ARGV[11] EWMA half-life seconds
+# ARGV[12] CPU usage percent ('' if unknown)
+# ARGV[13] memory usage percent ('' if unknown)
+# ARGV[14] number of static field/value pairs
+# ARGV[15..] static pairs followed by metric pairs
+HEARTBEAT_HASH = """
+local static_end = 15 + tonumber(ARGV[14]) * 2 - 1
+if redis.call('HGET', KEYS[1], '_digest') ~= ARGV[6] then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], '_digest', ARGV[6], unpack(ARGV, 15, static_end))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if #ARGV > static_end then
+    redis.call('HSET', KEYS[2], unpack(ARGV, static_end + 1, #ARGV))
+end
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if ARGV[2] ~= '' then
+    redis.call('SET', KEYS[3], ARGV[2], 'EX', ARGV[3])
+end
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[1])
+redis.call('ZADD', KEYS[5], ARGV[5], ARGV[1])
+""" + CONFIRM_RESERVATIONS.format(res=7, count=8, index=9, now=4, containers=9, ttl=10, expire=3) + """
+""" + UPDATE_EWMA.format(key=10, now=4, half_life=11, cpu=12, memory=13, containers=9, expire=3) + """
+local seq = redis.call('INCR', KEYS[6])
+redis.call('PUBLISH', ARGV[7], '{"seq":' .. seq .. ',"node":' .. ARGV[8] .. ',"ewma":' .. ewma .. '}')
+return seq
+"""
+
+
+# Reserve capacity on the best ``count`` candidates in one step, so
+# concurrent selections see each other's picks. A candidate's effective
+# score and container count include its live reservations; candidates
+# already at max_containers are skipped. With a demand (bin packing), so
+# are candidates whose free cores or memory no longer cover one more
+# demand once each live reservation has taken its share. Returns a flat
+# list of (candidate number, reservations including this one) pairs, or an
+# empty list if fewer than ``count`` candidates have room.
+#
+# KEYS[1] reserved index (zset of hostnames by last reservation time)
+# KEYS[1 + i] node:{hostname}:reservations (zset) of the i-th candidate
+# ARGV[1] now (unix)
+# ARGV[2] reservation TTL seconds
+# ARGV[3] number of nodes to reserve
+# ARGV[4] reservation id
+# ARGV[5] score penalty per live reservation
+# ARGV[6] ranking: 'score' (effective load score), 'containers' (effective
+#         containers, then score) or 'ordered' (candidate order)
+# ARGV[7] demand cores per reservation (0 = no capacity check)
+# ARGV[8] demand memory GB per reservation
+# ARGV[9..] per candidate: hostname, load score, containers, max containers
+#         (0 = no limit), free cores, free memory GB (both before reservations)
+RESERVE = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local count = tonumber(ARGV[3])
+local penalty = tonumber(ARGV[5])
+local rank = ARGV[6]
+local cores = tonumber(ARGV[7])
+local ram = tonumber(ARGV[8])
+local ranked = {}
+for i = 1, #KEYS - 1 do
+    local key = KEYS[i + 1]
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', '(' .. (now - ttl))
+    local reserved = redis.call('ZCARD', key)
+    local base = 9 + (i - 1) * 6
+    local containers = tonumber(ARGV[base + 2]) + reserved
+    local limit = tonumber(ARGV[base + 3])
+    local fits = limit <= 0 or containers < limit
+    if fits and cores > 0 then
+        fits = tonumber(ARGV[base + 4]) - reserved * cores >= cores
+            and tonumber(ARGV[base + 5]) - reserved * ram >= ram
+    end
+    if fits then
+        local score = tonumber(ARGV[base + 1]) + reserved * penalty
+        local primary, secondary = score, 0
+        if rank == 'containers' then
+            primary, secondary = containers, score
+        elseif rank == 'ordered' then
+            primary = 0
+        end
+        table.insert(ranked, {i, primary, secondary, reserved})
+    end
+end
+if #ranked < count then
+    return {}
+end
+table.sort(ranked, function(a, b)
+    if a[2] ~= b[2] then
+        return a[2] < b[2]
+    end
+    if a[3] ~= b[3] then
+        return a[3] < b[3]
+    end
+    return a[1] < b[1]
+end)
+local picked = {}
+for j = 1, count do
+    local i = ranked[j][1]
+    redis.call('ZADD', KEYS[i + 1], now, ARGV[4])
+    redis.call('EXPIRE', KEYS[i + 1], math.ceil(ttl))
+    redis.call('ZADD', KEYS[1], now, ARGV[9 + (i - 1) * 6])
+    table.insert(picked, i)
+    table.insert(picked, ranked[j][4] + 1)
+end
+return picked
+"""
@@ -1,33 +1,280 @@
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
-from redis import ConnectionPool, Redis
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
 from config import Config
+from redis_client import get_client
+from services import redis_scripts
+from utils.bin_packing import Demand, node_free
+from utils.scoring import EWMA_FIELDS, calculate_node_score
 
 logger = logging.getLogger(__name__)
 
+# Hash layout: field name -> decoder. Static facts change rarely and are
+# rewritten only when their digest changes; metrics change every heartbeat.
+STATIC_FIELDS = {
+    'hostname': str,
+    'ip': str,
+    'cpu_cores': int,
+    'ram_gb': float,
+    'has_gpu': lambda v: v == '1',
+    'max_containers': int,
+}
+METRIC_FIELDS = {
+    'cpu_usage_percent': float,
+    'memory_usage_percent': float,
+    'disk_usage_percent': float,
+    'active_jupyterlab': int,
+    'active_ray': int,
+    'total_containers': int,
+    'load_score': float,
+    'is_active': lambda v: v == '1',
+    'last_updated': str,
+    'gpu_info': json.loads,
+}
+
+
+def _encode_field(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return '' if value is None else str(value)
+
+
+def _decode_fields(names, values, decoders) -> Dict:
+    decoded = {}
+    for name, value in zip(names, values):
+        if value is None or value == '':
+            continue
+        try:
+            decoded[name] = decoders[name](value)
+        except (TypeError, ValueError):
+            logger.warning(f"Failed to decode field {name}={value!r}")
+    return decoded
+
+
+def heartbeat_call(hostname: str, data: dict, load_score: float) -> Tuple[str, List, List]:
+    """Script name, KEYS and ARGV that store one heartbeat in the configured layout.
+
+    Shared by RedisService and AsyncRedisService so both write identical state.
+    """
+    payload = json.dumps({**data, 'hostname': hostname, 'load_score': load_score})
+    ip_key = f"node:{hostname}:ip"
+    now = time.time()
+    containers = data.get('total_containers')
+    containers = '' if containers is None else int(containers)
+    reservation_keys = [
+        reservation_key(hostname),
+        f"node:{hostname}:containers",
+        RedisService.RESERVED_INDEX_KEY,
+        ewma_key(hostname),
+    ]
+    ewma_args = [
+        Config.EWMA_HALF_LIFE_SECONDS,
+        _optional_number(data.get('cpu_usage_percent')),
+        _optional_number(data.get('memory_usage_percent')),
+    ]
+
+    if Config.REDIS_NODE_LAYOUT != 'hash':
+        return 'heartbeat', [
+            f"node:{hostname}:info",
+            ip_key,
+            RedisService.NODE_INDEX_KEY,
+            RedisService.LOAD_INDEX_KEY,
+            RedisService.NODE_EVENTS_SEQ_KEY,
+            *reservation_keys,
+        ], [
+            hostname,
+            payload,
+            data.get('ip') or '',
+            Config.REDIS_EXPIRE_SECONDS,
+            now,
+            load_score,
+            RedisService.NODE_EVENTS_CHANNEL,
+            containers,
+            Config.RESERVATION_TTL,
+            *ewma_args,
+        ]
+
+    static = {'hostname': hostname}
+    static.update({f: data[f] for f in STATIC_FIELDS if f in data and f != 'hostname'})
+    metrics = {f: data[f] for f in METRIC_FIELDS if f in data}
+    metrics['load_score'] = load_score
+
+    static_pairs = [item for f, v in static.items() for item in (f, _encode_field(v))]
+    metric_pairs = [item for f, v in metrics.items() for item in (f, _encode_field(v))]
+    digest = hashlib.sha1("\x1f".join(static_pairs).encode()).hexdigest()
+
+    return 'heartbeat_hash', [
+        f"node:{hostname}:static",
+        f"node:{hostname}:metrics",
+        ip_key,
+        RedisService.NODE_INDEX_KEY,
+        RedisService.LOAD_INDEX_KEY,
+        RedisService.NODE_EVENTS_SEQ_KEY,
+        *reservation_keys,
+    ], [
+        hostname,
+        data.get('ip') or '',
+        Config.REDIS_EXPIRE_SECONDS,
+        now,
+        load_score,
+        digest,
+        RedisService.NODE_EVENTS_CHANNEL,
+        payload,
+        containers,
+        Config.RESERVATION_TTL,
+        *ewma_args,
+        len(static),
+        *static_pairs,
+        *metric_pairs,
+    ]
+
+
+def _optional_number(value):
+    return '' if value is None else float(value)
+
+
+def ewma_key(hostname: str) -> str:
+    return f"node:{hostname}:ewma"
+
+
+def queue_ewma_reads(pipe, hostnames: Sequence[str]):
+    for hostname in hostnames:
+        pipe.hmget(ewma_key(hostname), list(EWMA_FIELDS.values()))
+
+
+def parse_ewma_replies(hostnames: Sequence[str], replies: Sequence) -> Dict[str, Dict]:
+    """Moving averages per hostname, from the replies queued by queue_ewma_reads"""
+    result = {}
+    for hostname, values in zip(hostnames, replies):
+        averages = {f: round(float(v), 2) for f, v in zip(EWMA_FIELDS.values(), values) if v is not None}
+        if averages:
+            result[hostname] = averages
+    return result
+
+
+def reservation_key(hostname: str) -> str:
+    return f"node:{hostname}:reservations"
+
+
+def reserve_call(candidates: Sequence[Dict], count: int, reservation_id: str,
+                 rank: str = 'score', demand: Optional[Demand] = None) -> Tuple[List, List]:
+    """KEYS and ARGV of the reserve script for ``candidates``, ranked by ``rank``.
+
+    With ``demand``, each live reservation takes that many cores and GB out
+    of the candidate's free capacity (from raw metrics, without reservations).
+    """
+    keys = [RedisService.RESERVED_INDEX_KEY] + [reservation_key(n['hostname']) for n in candidates]
+    args = [time.time(), Config.RESERVATION_TTL, count, reservation_id, Config.RESERVATION_LOAD_PENALTY, rank,
+            demand.cores if demand else 0, demand.ram_gb if demand else 0]
+    for node in candidates:
+        free = node_free(node, demand) if demand else None
+        args += [
+            node['hostname'],
+            node.get('load_score') or 0,
+            node.get('total_containers') or 0,
+            node.get('max_containers') or 0,
+            free.cores if free else 0,
+            free.ram_gb if free else 0,
+        ]
+    return keys, args
+
+
+def parse_reserve_reply(reply: Sequence) -> List[Tuple[int, int]]:
+    """(candidate index, live reservations) for each reserved node, best first"""
+    return [(int(reply[i]) - 1, int(reply[i + 1])) for i in range(0, len(reply), 2)]
+
+
+def parse_info_blobs(hostnames: Sequence[str], values: Sequence[Optional[str]],
+                     fields: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+    """Decode MGET replies of node:<hostname>:info keys, keyed by hostname"""
+    result = {}
+    for hostname, raw in zip(hostnames, values):
+        if raw is None:
+            continue
+        try:
+            data = json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Failed to parse node:{hostname}:info: {e}")
+            continue
+        if fields is not None:
+            data = {f: data[f] for f in fields if f in data}
+        result[hostname] = data
+    return result
+
+
+def hash_read_plan(fields: Optional[Sequence[str]]) -> Tuple[List[str], List[str]]:
+    """Static and metric hash fields to HMGET for the requested ``fields``"""
+    if fields is None:
+        return list(STATIC_FIELDS), list(METRIC_FIELDS)
+    return [f for f in fields if f in STATIC_FIELDS], [f for f in fields if f in METRIC_FIELDS]
+
+
+def queue_hash_reads(pipe, hostnames: Sequence[str], static_fields: List[str], metric_fields: List[str]):
+    for hostname in hostnames:
+        if static_fields:
+            pipe.hmget(f"node:{hostname}:static", static_fields)
+        if metric_fields:
+            pipe.hmget(f"node:{hostname}:metrics", metric_fields)
+
+
+def parse_hash_replies(hostnames: Sequence[str], replies: Sequence,
+                       static_fields: List[str], metric_fields: List[str]) -> Dict[str, Dict]:
+    """Decode the pipeline replies queued by queue_hash_reads, keyed by hostname"""
+    replies = iter(replies)
+    result = {}
+    for hostname in hostnames:
+        static_values = next(replies) if static_fields else []
+        metric_values = next(replies) if metric_fields else []
+        # Both hashes expire together; an all-empty reply means the node is gone
+        if not any(v is not None for v in static_values + metric_values):
+            continue
+        data = _decode_fields(static_fields, static_values, STATIC_FIELDS)
+        data.update(_decode_fields(metric_fields, metric_values, METRIC_FIELDS))
+        result[hostname] = data
+    return result
+
+
 class RedisService:
+    # Sorted set of hostnames scored by last heartbeat (unix time)
+    NODE_INDEX_KEY = "nodes:heartbeat"
+    # Sorted set of hostnames scored by load score at last heartbeat
+    LOAD_INDEX_KEY = "nodes:load"
+    # Pub/sub channel every heartbeat is published to, as {"seq": n, "node": payload}
+    NODE_EVENTS_CHANNEL = "nodes:events"
+    # Counter giving node events a cluster-wide sequence number
+    NODE_EVENTS_SEQ_KEY = "nodes:events:seq"
+    # Sorted set of hostnames scored by their latest capacity reservation
+    RESERVED_INDEX_KEY = "nodes:reserved"
+
     def __init__(self):
-        self.pool = None
         self.client = None
+        self._scripts = {}
         self._connect()
 
     def _connect(self):
-        """Establish Redis connection"""
+        """Bind to the process-wide connection pool"""
         try:
-            self.pool = ConnectionPool(
-                host=Config.REDIS_HOST,
-                port=Config.REDIS_PORT,
-                password=Config.REDIS_PASSWORD,
-                decode_responses=True
-            )
-            self.client = Redis(connection_pool=self.pool)
-            self.client.ping()
-            logger.info(f"Connected to Redis at {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+            self.client = get_client()
+            self._scripts = {
+                'heartbeat': self.client.register_script(redis_scripts.HEARTBEAT),
+                'heartbeat_hash': self.client.register_script(redis_scripts.HEARTBEAT_HASH),
+                'prune_stale': self.client.register_script(redis_scripts.PRUNE_STALE),
+                'reserve': self.client.register_script(redis_scripts.RESERVE),
+            }
         except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
+            logger.error(f"Failed to set up Redis client: {e}")
             self.client = None
 
+    @property
+    def pool(self):
+        return self.client.connection_pool if self.client else None
+
     def is_connected(self) -> bool:
         """Check if Redis is connected"""
         if not self.client:
@@ -38,61 +285,236 @@ class RedisService:
         except:
             return False
 
-    def set_node_info(self, hostname: str, data: dict) -> bool:
-        """Store node information in Redis"""
+    @property
+    def uses_hash_layout(self) -> bool:
+        return Config.REDIS_NODE_LAYOUT == 'hash'
+
+    def set_node_info(self, hostname: str, data: dict,
+                      load_score: Optional[float] = None) -> bool:
+        """Store a node heartbeat in Redis.
+
+        Node state, IP key and both indexes are written, and the heartbeat
+        published on NODE_EVENTS_CHANNEL, by one server-side script, so a
+        heartbeat is a single round trip and readers never see the node
+        state and IP out of sync.
+        """
         if not self.client:
             return False
 
+        if load_score is None:
+            load_score = calculate_node_score(data)
+
         try:
-            self.client.set(
-                f"node:{hostname}:info",
-                json.dumps(data),
-                ex=Config.REDIS_EXPIRE_SECONDS
-            )
-            # Also store IP separately for compatibility
-            if 'ip' in data:
-                self.client.set(
-                    f"node:{hostname}:ip",
-                    data['ip'],
-                    ex=Config.REDIS_EXPIRE_SECONDS
-                )
+            script, keys, args = heartbeat_call(hostname, data, load_score)
+            self._scripts[script](keys=keys, args=args, client=self.client)
             return True
         except Exception as e:
             logger.error(f"Error storing node info: {e}")
             return False
 
-    def get_node_info(self, hostname: str) -> Optional[Dict]:
-        """Retrieve node information from Redis"""
+    def get_node_info(self, hostname: str,
+                      fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """Retrieve node information from Redis.
+
+        With ``fields`` only those keys are returned; the hash layout then
+        reads just those fields with HMGET instead of the whole node.
+        """
+        return self.get_nodes_info([hostname], fields).get(hostname)
+
+    def get_nodes_info(self, hostnames: Sequence[str],
+                       fields: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Retrieve information for several nodes in one round trip, keyed by hostname"""
+        if not self.client or not hostnames:
+            return {}
+
+        try:
+            if self.uses_hash_layout:
+                return self._get_node_hashes(hostnames, fields)
+
+            values = self.client.mget([f"node:{h}:info" for h in hostnames])
+        except Exception as e:
+            logger.error(f"Error retrieving node info: {e}")
+            return {}
+
+        return parse_info_blobs(hostnames, values, fields)
+
+    def _get_node_hashes(self, hostnames: Sequence[str],
+                         fields: Optional[Sequence[str]]) -> Dict[str, Dict]:
+        static_fields, metric_fields = hash_read_plan(fields)
+        pipe = self.client.pipeline(transaction=False)
+        queue_hash_reads(pipe, hostnames, static_fields, metric_fields)
+        return parse_hash_replies(hostnames, pipe.execute(), static_fields, metric_fields)
+
+    def subscribe(self, *channels: str):
+        """PubSub subscribed to ``channels``, on the dedicated pub/sub pool"""
+        pubsub = get_client("pubsub").pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*channels)
+        return pubsub
+
+    def subscribe_node_events(self):
+        """PubSub subscribed to NODE_EVENTS_CHANNEL"""
+        return self.subscribe(self.NODE_EVENTS_CHANNEL)
+
+    def publish(self, channel: str, message: str) -> bool:
+        """Publish a message, returns False if Redis is unavailable"""
         if not self.client:
-            return None
+            return False
 
         try:
-            data = self.client.get(f"node:{hostname}:info")
-            if data:
-                return json.loads(data)
+            self.client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.error(f"Error publishing to {channel}: {e}")
+            return False
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 60):
+        """Hold a cross-worker lock for the block; runs unlocked without Redis"""
+        lock = None
+        if self.client:
+            try:
+                lock = self.client.lock(f"locks:{name}", timeout=timeout, blocking_timeout=timeout)
+                if not lock.acquire():
+                    logger.warning(f"Timed out waiting for lock {name}, continuing without it")
+                    lock = None
+            except Exception as e:
+                logger.error(f"Error acquiring lock {name}: {e}")
+                lock = None
+
+        try:
+            yield
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except Exception as e:
+                    logger.error(f"Error releasing lock {name}: {e}")
+
+    def claim_interval(self, task: str, seconds: float) -> bool:
+        """Claim the current run of a periodic task across all workers.
+
+        The first caller in each ``seconds`` window gets True; everyone else
+        gets False until the claim expires. Without Redis every caller runs.
+        """
+        if not self.client:
+            return True
+
+        try:
+            return bool(self.client.set(f"tasks:{task}:claim", os.getpid(), nx=True, px=int(seconds * 1000)))
+        except Exception as e:
+            logger.error(f"Error claiming task {task}: {e}")
+            return True
+
+    def reserve_nodes(self, candidates: Sequence[Dict], count: int, reservation_id: str,
+                      rank: str = 'score', demand: Optional[Demand] = None) -> Optional[List[Tuple[int, int]]]:
+        """Atomically reserve capacity on the ``count`` best of ``candidates``.
+
+        ``rank`` orders candidates by effective load score ('score'),
+        effective containers ('containers') or as given ('ordered'). With
+        ``demand`` (bin packing), candidates must also still fit it in cores
+        and memory once their live reservations are counted.
+
+        Returns (candidate index, live reservations) pairs, an empty list if
+        too few candidates have room, or None when Redis is unavailable.
+        Reservations expire after RESERVATION_TTL or as heartbeats report
+        the new containers.
+        """
+        if not self.client:
             return None
+
+        try:
+            keys, args = reserve_call(candidates, count, reservation_id, rank, demand)
+            return parse_reserve_reply(self._scripts['reserve'](keys=keys, args=args, client=self.client))
         except Exception as e:
-            logger.error(f"Error retrieving node info: {e}")
+            logger.error(f"Error reserving nodes: {e}")
             return None
 
-    def get_all_node_keys(self) -> List[str]:
-        """Get all node keys from Redis"""
+    def get_reservations(self) -> Dict[str, int]:
+        """Live reservation count per reserved node.
+
+        Only nodes in the reserved index are read, so this is a single
+        round trip while nothing is reserved.
+        """
+        if not self.client:
+            return {}
+
+        try:
+            cutoff = time.time() - Config.RESERVATION_TTL
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zremrangebyscore(self.RESERVED_INDEX_KEY, "-inf", f"({cutoff}")
+            pipe.zrange(self.RESERVED_INDEX_KEY, 0, -1)
+            _, hostnames = pipe.execute()
+            if not hostnames:
+                return {}
+
+            pipe = self.client.pipeline(transaction=False)
+            for hostname in hostnames:
+                pipe.zcount(reservation_key(hostname), cutoff, "+inf")
+            return {h: n for h, n in zip(hostnames, pipe.execute()) if n}
+        except Exception as e:
+            logger.error(f"Error reading reservations: {e}")
+            return {}
+
+    def get_nodes_ewma(self, hostnames: Sequence[str]) -> Dict[str, Dict]:
+        """Moving averages of CPU, memory and containers (utils.scoring.EWMA_FIELDS)
+        for several nodes in one round trip, keyed by hostname"""
+        if not self.client or not hostnames:
+            return {}
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            queue_ewma_reads(pipe, hostnames)
+            return parse_ewma_replies(hostnames, pipe.execute())
+        except Exception as e:
+            logger.error(f"Error reading moving averages: {e}")
+            return {}
+
+    def get_live_hostnames(self) -> List[str]:
+        """Get hostnames with a heartbeat inside the expiry window"""
         if not self.client:
             return []
 
         try:
-            return self.client.keys("node:*:info")
+            since = time.time() - Config.REDIS_EXPIRE_SECONDS
+            return self.client.zrangebyscore(self.NODE_INDEX_KEY, since, "+inf")
         except Exception as e:
-            logger.error(f"Error getting node keys: {e}")
+            logger.error(f"Error listing live nodes: {e}")
             return []
 
+    def prune_stale_nodes(self) -> int:
+        """Drop index members whose last heartbeat is older than the expiry window"""
+        if not self.client:
+            return 0
+
+        try:
+            return self._prune_stale(self.client)
+        except Exception as e:
+            logger.error(f"Error pruning stale nodes: {e}")
+            return 0
+
+    def _prune_stale(self, client):
+        cutoff = time.time() - Config.REDIS_EXPIRE_SECONDS
+        return self._scripts['prune_stale'](
+            keys=[self.NODE_INDEX_KEY, self.LOAD_INDEX_KEY],
+            args=[cutoff],
+            client=client
+        )
+
+    def _state_key(self, hostname: str) -> str:
+        """Key holding the volatile state of a node in the configured layout"""
+        return f"node:{hostname}:metrics" if self.uses_hash_layout else f"node:{hostname}:info"
+
+    def get_all_node_keys(self) -> List[str]:
+        """Get state keys of all live nodes from the heartbeat index"""
+        return [self._state_key(hostname) for hostname in self.get_live_hostnames()]
+
     def get_node_ttl(self, hostname: str) -> int:
         """Get TTL for a node"""
         if not self.client:
             return -1
 
         try:
-            return self.client.ttl(f"node:{hostname}:info")
+            return self.client.ttl(self._state_key(hostname))
         except:
             return -1
 
@@ -102,28 +524,45 @@ class RedisService:
             return False
 
         try:
-            self.client.delete(f"node:{hostname}:info")
-            self.client.delete(f"node:{hostname}:ip")
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(
+                f"node:{hostname}:info",
+                f"node:{hostname}:static",
+                f"node:{hostname}:metrics",
+                f"node:{hostname}:ip",
+                f"node:{hostname}:containers",
+                reservation_key(hostname),
+                ewma_key(hostname)
+            )
+            pipe.zrem(self.NODE_INDEX_KEY, hostname)
+            pipe.zrem(self.LOAD_INDEX_KEY, hostname)
+            pipe.zrem(self.RESERVED_INDEX_KEY, hostname)
+            pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Error deleting node: {e}")
             return False
 
-    def get_all_nodes_data(self) -> List[Dict]:
-        """Get all nodes data from Redis"""
+    def get_all_nodes_data(self, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Get all live nodes data from Redis.
+
+        Stale index members are pruned and live ones listed in one
+        pipelined batch, then every node is read with a single MGET (or
+        one pipelined HMGET batch for the hash layout), so the whole read
+        costs two round trips regardless of node count.
+        """
         if not self.client:
             return []
 
-        nodes = []
-        for key in self.get_all_node_keys():
-            ttl = self.client.ttl(key)
-            if ttl <= 0:
-                continue
-
-            try:
-                data = json.loads(self.client.get(key))
-                nodes.append(data)
-            except Exception as e:
-                logger.warning(f"Failed to parse {key}: {e}")
+        try:
+            cutoff = time.time() - Config.REDIS_EXPIRE_SECONDS
+            pipe = self.client.pipeline(transaction=False)
+            self._prune_stale(pipe)
+            pipe.zrangebyscore(self.NODE_INDEX_KEY, cutoff, "+inf")
+            _, hostnames = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error fetching nodes data: {e}")
+            return []
 
-        return nodes
\ No newline at end of file
+        # Nodes whose state expired or was deleted after the index read are skipped
+        return list(self.get_nodes_info(hostnames, fields).values())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import the service modules the way app.py does, from service-discovery/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
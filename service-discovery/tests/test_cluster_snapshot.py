@@ -0,0 +1,43 @@
+from services.cluster_snapshot import ClusterSnapshotStore
+from services.node_service import filter_available_nodes
+from utils.scoring import calculate_node_score
+
+
+def db_node(hostname, node_id, cpu=None, memory=None):
+    """A node as NodeService.load_all_nodes returns it; no usage when its Redis state expired"""
+    return {
+        'id': node_id, 'hostname': hostname, 'ip': f'10.0.0.{node_id}',
+        'cpu_cores': 8, 'ram_gb': 16, 'has_gpu': False, 'gpu_info': [],
+        'is_active': True, 'max_containers': 10,
+        'cpu_usage_percent': cpu, 'memory_usage_percent': memory,
+        'total_containers': 0,
+    }
+
+
+def test_rebuild_with_node_without_live_redis_data():
+    nodes = [db_node('n1', 1), db_node('n2', 2, cpu=20.0, memory=30.0)]
+    store = ClusterSnapshotStore(lambda: [dict(n) for n in nodes])
+
+    snapshot = store.rebuild()
+
+    assert snapshot.nodes['n1']['load_score'] is None
+    assert snapshot.nodes['n2']['load_score'] == calculate_node_score(nodes[1])
+    available = filter_available_nodes(store.get_nodes())
+    assert [n['hostname'] for n in available] == ['n2']
+
+
+def test_heartbeat_for_unknown_node_waits_for_rebuild():
+    nodes = [db_node('n1', 1, cpu=20.0, memory=30.0)]
+    store = ClusterSnapshotStore(lambda: [dict(n) for n in nodes])
+    store.rebuild()
+
+    store.apply_heartbeat({'hostname': 'new', 'ip': '10.0.0.9', 'cpu_usage_percent': 5.0,
+                           'memory_usage_percent': 5.0})
+    store.apply_heartbeat({'hostname': 'n1', 'cpu_usage_percent': 50.0, 'memory_usage_percent': 30.0})
+
+    assert 'new' not in store.current().nodes
+    assert store.get_node('n1')['cpu_usage_percent'] == 50.0
+    assert store.get_node('n1')['id'] == 1
+
+    nodes.append(db_node('new', 9, cpu=5.0, memory=5.0))
+    assert store.rebuild().nodes['new']['id'] == 9
@@ -0,0 +1,29 @@
+from services.metric_writer import invalid_node_fields, missing_node_fields
+
+
+def heartbeat(**overrides):
+    data = {
+        'hostname': 'n1', 'ip': '10.0.0.1', 'cpu_cores': 8, 'ram_gb': 15.5,
+        'has_gpu': False, 'gpu_info': [], 'cpu_usage_percent': 12.5,
+        'memory_usage_percent': 40, 'total_containers': 2,
+    }
+    data.update(overrides)
+    return data
+
+
+def test_valid_heartbeat():
+    assert invalid_node_fields(heartbeat()) == []
+    assert missing_node_fields(heartbeat()) == []
+
+
+def test_wrong_types_are_reported():
+    assert invalid_node_fields(heartbeat(cpu_cores="abc")) == ['cpu_cores']
+    assert invalid_node_fields(heartbeat(cpu_cores=True, has_gpu="yes")) == ['cpu_cores', 'has_gpu']
+    assert invalid_node_fields(heartbeat(cpu_usage_percent="50")) == ['cpu_usage_percent']
+
+
+def test_missing_fields_are_not_type_errors():
+    data = heartbeat(ip=None)
+    del data['ram_gb']
+    assert invalid_node_fields(data) == []
+    assert missing_node_fields(data) == ['ip', 'ram_gb']
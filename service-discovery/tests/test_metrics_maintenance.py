@@ -0,0 +1,11 @@
+from datetime import datetime, timedelta
+
+from services.metrics_maintenance import bucket_floor
+
+
+def test_bucket_floor_matches_date_bin():
+    moment = datetime(2026, 10, 17, 13, 47, 31)
+    assert bucket_floor(moment, timedelta(minutes=1)) == datetime(2026, 10, 17, 13, 47)
+    assert bucket_floor(moment, timedelta(minutes=5)) == datetime(2026, 10, 17, 13, 45)
+    assert bucket_floor(moment, timedelta(hours=1)) == datetime(2026, 10, 17, 13, 0)
+    assert bucket_floor(datetime(2026, 10, 17, 13, 45), timedelta(minutes=5)) == datetime(2026, 10, 17, 13, 45)
@@ -0,0 +1,18 @@
+from services.profile_index import ProfileEligibilityIndex, node_matches_profile
+
+PROFILE = {
+    'id': 2, 'cpu_requirement': 4, 'ram_requirement': 8, 'gpu_required': False,
+    'max_cpu_usage': None, 'max_memory_usage': None, 'is_active': True,
+}
+
+
+def test_node_with_unparseable_static_fields_matches_nothing():
+    index = ProfileEligibilityIndex()
+    index.update_profile(PROFILE)
+
+    index.update_node({'hostname': 'bad', 'cpu_cores': 'abc', 'ram_gb': 16})
+    index.update_node({'hostname': 'good', 'cpu_cores': 8, 'ram_gb': 16})
+    index.update_node({'hostname': 'text', 'cpu_cores': '8', 'ram_gb': '16'})
+
+    assert index.eligible(2) == {'good', 'text'}
+    assert not node_matches_profile(PROFILE, {'cpu_cores': 'abc', 'ram_gb': 16})
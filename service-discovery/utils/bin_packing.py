@@ -0,0 +1,127 @@
+"""
+Multi-resource placement over absolute node capacity.
+
+calculate_node_score compares usage percentages, so a 4-core node at 20%
+ranks above a 64-core node at 25%. Here usage is turned into free cores,
+free GB and free container slots, and a node fits a request only if all
+three cover its demand. Fitting nodes are ranked by what would be left
+after placement:
+
+- 'pack':   least left over first, keeping large nodes free for large requests
+- 'spread': most left over first, keeping headroom on every node
+
+Both add a fragmentation term, the gap between the leftover fractions of
+cores and memory, so placements that strand one resource (cores with no
+memory left, say) rank lower. Its weight is Config.BIN_PACKING_FRAGMENTATION_WEIGHT.
+"""
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+from config import Config
+
+OBJECTIVES = ('pack', 'spread')
+
+
+class Demand(NamedTuple):
+    """What one placement needs from a node, and how full the node may get"""
+    cores: float
+    ram_gb: float
+    slots: int = 1
+    max_cpu_usage: float = Config.DEFAULT_MAX_CPU_USAGE
+    max_memory_usage: float = Config.DEFAULT_MAX_MEMORY_USAGE
+
+
+class Resources(NamedTuple):
+    cores: float
+    ram_gb: float
+    # math.inf when the node has no container limit
+    slots: float
+
+
+def demand_for_profile(profile: Optional[dict]) -> Demand:
+    """Demand of one container of ``profile``; defaults when no profile is given"""
+    profile = profile or {}
+    return Demand(
+        cores=profile.get('cpu_requirement') or Config.BIN_PACKING_DEFAULT_CORES,
+        ram_gb=profile.get('ram_requirement') or Config.BIN_PACKING_DEFAULT_RAM_GB,
+        max_cpu_usage=profile.get('max_cpu_usage') or Config.DEFAULT_MAX_CPU_USAGE,
+        max_memory_usage=profile.get('max_memory_usage') or Config.DEFAULT_MAX_MEMORY_USAGE,
+    )
+
+
+def node_capacity(node: Dict, demand: Demand) -> Resources:
+    """Usable capacity: cores and memory up to the demand's usage ceilings"""
+    return Resources(
+        cores=(node.get('cpu_cores') or 0) * demand.max_cpu_usage / 100,
+        ram_gb=(node.get('ram_gb') or 0) * demand.max_memory_usage / 100,
+        slots=node.get('max_containers') or math.inf,
+    )
+
+
+def node_free(node: Dict, demand: Demand) -> Resources:
+    """Absolute headroom left below the demand's usage ceilings.
+
+    Live reservations (``reserved_containers``, see
+    node_service.apply_reservations) are not in the usage figures yet, so
+    each takes one demand's worth of cores and memory; they are already in
+    ``total_containers``.
+    """
+    cpu_usage = node.get('cpu_usage_percent', 100)
+    memory_usage = node.get('memory_usage_percent', 100)
+    reserved = node.get('reserved_containers') or 0
+    return Resources(
+        cores=max(0.0, (node.get('cpu_cores') or 0) * (demand.max_cpu_usage - cpu_usage) / 100
+                  - reserved * demand.cores),
+        ram_gb=max(0.0, (node.get('ram_gb') or 0) * (demand.max_memory_usage - memory_usage) / 100
+                   - reserved * demand.ram_gb),
+        slots=max(0, (node.get('max_containers') or math.inf) - (node.get('total_containers') or 0)),
+    )
+
+
+def placement_score(node: Dict, demand: Demand, objective: str = 'pack',
+                    fragmentation_weight: Optional[float] = None) -> Optional[float]:
+    """Rank of placing ``demand`` on ``node`` (lower is better), None if it does not fit"""
+    free = node_free(node, demand)
+    if free.cores < demand.cores or free.ram_gb < demand.ram_gb or free.slots < demand.slots:
+        return None
+
+    capacity = node_capacity(node, demand)
+    if not capacity.cores or not capacity.ram_gb:
+        return None
+
+    # Fraction of each dimension left after placement
+    cores_left = (free.cores - demand.cores) / capacity.cores
+    ram_left = (free.ram_gb - demand.ram_gb) / capacity.ram_gb
+    left = [cores_left, ram_left]
+    if capacity.slots != math.inf:
+        left.append((free.slots - demand.slots) / capacity.slots)
+
+    mean_left = sum(left) / len(left)
+    base = mean_left if objective == 'pack' else 1 - mean_left
+    if fragmentation_weight is None:
+        fragmentation_weight = Config.BIN_PACKING_FRAGMENTATION_WEIGHT
+    # Slots are not stranded by an uneven placement, so only cores and memory count
+    return base + fragmentation_weight * abs(cores_left - ram_left)
+
+
+def rank_nodes(nodes: List[Dict], demand: Demand, objective: str = 'pack',
+               fragmentation_weight: Optional[float] = None) -> List[Dict]:
+    """Nodes that fit ``demand``, best placement first, ties broken by load score"""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown bin packing objective '{objective}', expected one of {', '.join(OBJECTIVES)}")
+
+    ranked = []
+    for node in nodes:
+        score = placement_score(node, demand, objective, fragmentation_weight)
+        if score is not None:
+            node['placement_score'] = round(score, 4)
+            ranked.append(node)
+
+    ranked.sort(key=lambda n: (n['placement_score'], n.get('load_score', 0)))
+    return ranked
+
+
+def select_bin_packing(nodes: List[Dict], count: int, demand: Demand,
+                       objective: str = 'pack') -> List[Dict]:
+    """Best ``count`` nodes for one placement of ``demand`` each"""
+    return rank_nodes(nodes, demand, objective)[:max(count, 0)]
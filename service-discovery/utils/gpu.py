@@ -0,0 +1,95 @@
+"""
+GPU device selection from the agent's per-device gpu_info.
+
+Each device is scored on memory in use and compute utilisation (lower is
+better, 0-100 like the load score). Selections for GPU profiles add the
+node's best device score to its load score, weighted by GPU_SCORE_WEIGHT,
+and carry the chosen device as ``gpu_device`` so the spawner can pin it.
+"""
+from typing import Dict, List, Optional
+
+from config import Config
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def gpu_free_memory_mb(gpu: Dict) -> Optional[float]:
+    total, used = _number(gpu.get('memory_total_mb')), _number(gpu.get('memory_used_mb'))
+    if total is None or used is None:
+        return None
+    return max(0.0, total - used)
+
+
+def gpu_device_score(gpu: Dict) -> float:
+    """0-100, lower is better; unknown metrics count as fully used"""
+    total = _number(gpu.get('memory_total_mb'))
+    free = gpu_free_memory_mb(gpu)
+    memory_used = 100.0 if not total or free is None else (1 - free / total) * 100
+    utilization = _number(gpu.get('utilization_gpu_percent'))
+    utilization = 100.0 if utilization is None else utilization
+    return (
+        Config.GPU_MEMORY_WEIGHT * memory_used + Config.GPU_UTILIZATION_WEIGHT * utilization
+    ) / (Config.GPU_MEMORY_WEIGHT + Config.GPU_UTILIZATION_WEIGHT)
+
+
+def rank_gpus(gpu_info: Optional[List[Dict]]) -> List[Dict]:
+    """Devices with at least GPU_MIN_FREE_MEMORY_MB free (or unknown memory), best first"""
+    usable = []
+    for gpu in gpu_info or []:
+        if not isinstance(gpu, dict) or gpu.get('index') is None:
+            continue
+        free = gpu_free_memory_mb(gpu)
+        if free is not None and free < Config.GPU_MIN_FREE_MEMORY_MB:
+            continue
+        usable.append(gpu)
+
+    # Most free memory breaks ties, then the cooler device
+    usable.sort(key=lambda g: (
+        gpu_device_score(g),
+        -(gpu_free_memory_mb(g) or 0),
+        _number(g.get('temperature_gpu')) or 0,
+    ))
+    return usable
+
+
+def gpu_device(gpu: Dict) -> Dict:
+    """Selection result entry for a device"""
+    free = gpu_free_memory_mb(gpu)
+    return {
+        'index': gpu.get('index'),
+        'uuid': gpu.get('uuid'),
+        'name': gpu.get('name'),
+        'memory_free_mb': round(free) if free is not None else None,
+        'utilization_gpu_percent': gpu.get('utilization_gpu_percent'),
+    }
+
+
+def pick_gpu(gpu_info: Optional[List[Dict]], skip: int = 0) -> Optional[Dict]:
+    """Best device, or the ``skip``-th next best (wrapping) so that selections
+    reserved on the same node before a heartbeat get different devices"""
+    ranked = rank_gpus(gpu_info)
+    if not ranked:
+        return None
+    return gpu_device(ranked[skip % len(ranked)])
+
+
+def apply_gpu_placement(nodes: List[Dict]) -> List[Dict]:
+    """Nodes with a usable GPU, with ``gpu_device`` set and the device score
+    folded into ``load_score``, re-sorted by it"""
+    placed = []
+    for node in nodes:
+        ranked = rank_gpus(node.get('gpu_info'))
+        if not ranked:
+            continue
+        node['gpu_device'] = gpu_device(ranked[0])
+        node['gpu_score'] = round(gpu_device_score(ranked[0]), 2)
+        node['load_score'] = round(node['load_score'] + Config.GPU_SCORE_WEIGHT * node['gpu_score'], 2)
+        placed.append(node)
+
+    placed.sort(key=lambda n: n['load_score'])
+    return placed
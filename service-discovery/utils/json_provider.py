@@ -0,0 +1,81 @@
+"""
+JSON providers for the discovery API, selected with Config.JSON_PROVIDER.
+
+Models' to_dict return native datetimes; both providers render them as
+ISO 8601 strings, so the wire format does not depend on the choice.
+
+- 'orjson': serialises in C, including datetimes, straight to bytes
+- 'std':    Flask's provider with ISO datetimes instead of HTTP dates
+"""
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the std provider
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, UUID):
+        return str(o)
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StdJSONProvider(DefaultJSONProvider):
+    """Flask's json-module provider, with ISO 8601 datetimes"""
+    default = staticmethod(_default)
+    # Key order carries no meaning in these payloads; sorting costs CPU
+    sort_keys = False
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; responses are written as bytes without a str round trip"""
+    mimetype = "application/json"
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.option | orjson.OPT_APPEND_NEWLINE),
+            mimetype=self.mimetype,
+        )
+
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'std': StdJSONProvider,
+}
+
+
+def provider_class(name: str):
+    """Provider class for ``name``, falling back to 'std' when orjson is missing"""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON provider '{name}', expected one of {', '.join(PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        logger.warning("orjson is not installed, using the std JSON provider")
+        return StdJSONProvider
+    return PROVIDERS[name]
+
+
+def init_json(app, name: str):
+    """Install the named provider on a Flask (or Quart) app"""
+    app.json = provider_class(name)(app)
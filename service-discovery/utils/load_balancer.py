@@ -1,29 +1,54 @@
+import heapq
+import logging
+import random
 import threading
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from config import Config
+from redis_client import redis_client
+from utils.bin_packing import Demand, demand_for_profile, rank_nodes, select_bin_packing
 from utils.scoring import calculate_node_score
 
-# round-robin counter
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ('best_fit', 'round_robin', 'random', 'power_of_two', 'least_connection', 'bin_pack', 'bin_spread')
+
+# Bin packing algorithms and their objective (see utils/bin_packing.py)
+BIN_PACKING = {'bin_pack': 'pack', 'bin_spread': 'spread'}
+
+# round-robin counter; shared through Redis so every worker advances the
+# same position, with the local counter as fallback while Redis is down
 _round_robin_counter = 0
 _counter_lock = threading.Lock()
 
+def _advance_round_robin(step: int = 1) -> int:
+    """Reserve ``step`` consecutive positions and return the first one"""
+    global _round_robin_counter
+
+    try:
+        return redis_client.incrby(Config.ROUND_ROBIN_COUNTER_KEY, step) - step
+    except Exception as e:
+        logger.warning(f"Round-robin counter unavailable in Redis, using local counter: {e}")
+
+    with _counter_lock:
+        start = _round_robin_counter
+        _round_robin_counter = (_round_robin_counter + step) % 1_000_000
+        return start
+
 def get_round_robin_counter() -> int:
     """Get current round-robin counter value"""
-    global _round_robin_counter
-    return _round_robin_counter
+    try:
+        return int(redis_client.get(Config.ROUND_ROBIN_COUNTER_KEY) or 0)
+    except Exception:
+        return _round_robin_counter
 
 def get_next_round_robin_node(nodes: List[Dict]) -> Optional[Dict]:
     """
     Select next node using round-robin algorithm
     """
-    global _round_robin_counter
-
     if not nodes:
         return None
 
-    with _counter_lock:
-        idx = _round_robin_counter % len(nodes)
-        _round_robin_counter = (_round_robin_counter + 1) % 1_000_000
-        return nodes[idx]
+    return nodes[_advance_round_robin() % len(nodes)]
 
 def select_best_nodes(nodes: List[Dict], count: int = 1) -> List[Dict]:
     """
@@ -43,9 +68,78 @@ def select_best_nodes(nodes: List[Dict], count: int = 1) -> List[Dict]:
     # Return top N nodes
     return sorted_nodes[:min(count, len(sorted_nodes))]
 
+def select_power_of_two(nodes: List[Dict], count: int = 1) -> List[Dict]:
+    """
+    Power-of-two-choices: each pick samples two nodes at random and keeps
+    the less loaded one. Constant work per pick and no sort; concurrent
+    callers working from the same snapshot rarely agree, so they do not
+    herd onto the single least-loaded node.
+    """
+    pool = list(nodes)
+    selected = []
+    while pool and len(selected) < count:
+        if len(pool) == 1:
+            i = 0
+        else:
+            a, b = random.sample(range(len(pool)), 2)
+            i = a if pool[a]['load_score'] <= pool[b]['load_score'] else b
+        # Swap-remove so picks stay distinct
+        pool[i], pool[-1] = pool[-1], pool[i]
+        selected.append(pool.pop())
+    return selected
+
+def select_least_connection(nodes: List[Dict], count: int = 1) -> List[Dict]:
+    """
+    Nodes running the fewest containers, ties broken by load score.
+    NodeService.get_available_nodes counts in-flight reservations in
+    total_containers, so fresh selections are included.
+    """
+    return heapq.nsmallest(count, nodes, key=lambda n: (n.get('total_containers') or 0, n['load_score']))
+
+def resolve_algorithm(requested: Optional[str], profile: Optional[Dict] = None,
+                      default: str = 'best_fit') -> str:
+    """Algorithm for a request: explicit choice, then the profile's, then ``default``"""
+    algorithm = requested or (profile or {}).get('selection_algorithm') or default
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {', '.join(ALGORITHMS)}")
+    return algorithm
+
+def reservation_candidates(nodes: List[Dict], algorithm: str, count: int, limit: int,
+                           round_robin_start: Optional[int] = None,
+                           demand: Optional[Demand] = None) -> Tuple[List[Dict], str]:
+    """
+    Candidates for RedisService.reserve_nodes, best first, and how the
+    reserve script should rank them: by load score ('score'), by
+    containers ('containers'), or in the given order ('ordered'). Ordered
+    algorithms are followed by the remaining nodes by score, so the
+    script can skip picks that are already full; bin packing offers only
+    the nodes the demand fits.
+    """
+    limit = max(limit, count)
+    if algorithm == 'best_fit':
+        return select_best_nodes(nodes, limit), 'score'
+    if algorithm == 'least_connection':
+        return select_least_connection(nodes, limit), 'containers'
+    if algorithm in BIN_PACKING:
+        return rank_nodes(nodes, demand or demand_for_profile(None), BIN_PACKING[algorithm])[:limit], 'ordered'
+
+    picked = select_nodes_by_algorithm(nodes, algorithm, count, round_robin_start=round_robin_start)
+    chosen = {n['hostname'] for n in picked}
+    rest = [n for n in select_best_nodes(nodes, len(nodes)) if n['hostname'] not in chosen]
+    return (picked + rest)[:limit], 'ordered'
+
 def select_nodes_by_algorithm(nodes: List[Dict],
                             algorithm: str = 'round_robin',
-                            count: int = 1) -> List[Dict]:
+                            count: int = 1,
+                            round_robin_start: Optional[int] = None,
+                            demand: Optional[Demand] = None) -> List[Dict]:
+    """
+    Select ``count`` nodes with the given algorithm. Callers that advance
+    the round-robin counter themselves (the async routes) pass the reserved
+    position as ``round_robin_start``. Bin packing places ``demand`` (see
+    utils/bin_packing.demand_for_profile) and may return fewer nodes when
+    it does not fit enough of them.
+    """
     if not nodes:
         return []
 
@@ -60,19 +154,27 @@ def select_nodes_by_algorithm(nodes: List[Dict],
     elif algorithm == 'round_robin':
         # Sort by score first
         sorted_nodes = sorted(nodes, key=lambda x: x['load_score'])
-        selected = []
-        for _ in range(min(count, len(sorted_nodes))):
-            node = get_next_round_robin_node(sorted_nodes)
-            if node and node not in selected:
-                selected.append(node)
-        return selected
+        take = min(count, len(sorted_nodes))
+        if take <= 0:
+            return []
+        # One counter round trip per request, however many nodes it takes
+        start = round_robin_start if round_robin_start is not None else _advance_round_robin(take)
+        return [sorted_nodes[(start + i) % len(sorted_nodes)] for i in range(take)]
 
     elif algorithm == 'random':
-        import random
         available = nodes.copy()
         random.shuffle(available)
         return available[:min(count, len(available))]
 
+    elif algorithm == 'power_of_two':
+        return select_power_of_two(nodes, count)
+
+    elif algorithm == 'least_connection':
+        return select_least_connection(nodes, count)
+
+    elif algorithm in BIN_PACKING:
+        return select_bin_packing(nodes, count, demand or demand_for_profile(None), BIN_PACKING[algorithm])
+
     else:
         raise ValueError(f"Unknown algorithm: {algorithm}")
 
@@ -0,0 +1,81 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Fields of the compact node view: what a node list or card renders.
+# gpu_info is summarised as gpu_count / gpu_name.
+COMPACT_FIELDS = (
+    'id', 'hostname', 'ip', 'cpu_cores', 'ram_gb', 'has_gpu',
+    'cpu_usage_percent', 'memory_usage_percent', 'total_containers', 'load_score',
+)
+
+NODE_VIEWS = ('full', 'compact')
+
+
+class NodeView(NamedTuple):
+    """How node dicts are rendered in a response"""
+    view: str = 'full'
+    fields: Optional[Tuple[str, ...]] = None
+    include_all: bool = True
+    limit: Optional[int] = None
+
+
+def parse_node_view(args) -> NodeView:
+    """NodeView from ``view=``, ``fields=``, ``include_all=`` and ``limit=``; raises ValueError"""
+    view = args.get('view', 'full').lower()
+    if view not in NODE_VIEWS:
+        raise ValueError(f"view must be one of {', '.join(NODE_VIEWS)}")
+
+    fields = None
+    if args.get('fields'):
+        # hostname identifies the node, so it is always returned
+        fields = tuple(dict.fromkeys(['hostname'] + [
+            f.strip() for f in args['fields'].split(',') if f.strip()
+        ]))
+
+    limit = args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        raise ValueError("limit must be zero or positive")
+
+    return NodeView(
+        view=view,
+        fields=fields,
+        include_all=args.get('include_all', 'true').lower() == 'true',
+        limit=limit,
+    )
+
+
+def compact_node(node: Dict) -> Dict:
+    data = {f: node.get(f) for f in COMPACT_FIELDS}
+    gpus = node.get('gpu_info') or []
+    data['gpu_count'] = len(gpus)
+    data['gpu_name'] = gpus[0].get('name') if gpus and isinstance(gpus[0], dict) else None
+    return data
+
+
+def shape_node(node: Dict, view: NodeView) -> Dict:
+    """Node rendered for ``view``; ``fields`` wins over the view preset"""
+    if view.fields is not None:
+        return {f: node[f] for f in view.fields if f in node}
+    if view.view == 'compact':
+        return compact_node(node)
+    return node
+
+
+def shape_nodes(nodes: List[Dict], view: NodeView) -> List[Dict]:
+    if view.view == 'full' and view.fields is None:
+        return nodes
+    return [shape_node(node, view) for node in nodes]
+
+
+def available_nodes_payload(nodes: List[Dict], selected: List[Dict],
+                            view: NodeView, load_balancing: Dict) -> Dict:
+    """/available-nodes response: totals always cover every available node,
+    ``all_available_nodes`` is capped by ``limit`` and omitted with include_all=false"""
+    payload = {
+        "total_available_nodes": len(nodes),
+        "selected_nodes": shape_nodes(selected, view),
+    }
+    if view.include_all:
+        listed = nodes if view.limit is None else nodes[:view.limit]
+        payload["all_available_nodes"] = shape_nodes(listed, view)
+    payload["load_balancing"] = load_balancing
+    return payload
@@ -1,12 +1,33 @@
+from typing import Optional
+
 from config import Config
 
-def calculate_node_score(node_data: dict) -> float:
+# Raw heartbeat metric -> its moving average, kept per node by the
+# heartbeat scripts (half-life Config.EWMA_HALF_LIFE_SECONDS)
+EWMA_FIELDS = {
+    "cpu_usage_percent": "cpu_usage_ewma",
+    "memory_usage_percent": "memory_usage_ewma",
+    "total_containers": "total_containers_ewma",
+}
+
+def _usage(node_data: dict, field: str, smoothed: bool):
+    if smoothed and node_data.get(EWMA_FIELDS[field]) is not None:
+        return node_data[EWMA_FIELDS[field]]
+    return node_data.get(field, 100)
+
+def calculate_node_score(node_data: dict, smoothed: Optional[bool] = None) -> float:
     """
     Calculate score for a node based on CPU and memory usage.
     Lower score = better performance.
+
+    With ``smoothed`` (default Config.SCORE_USE_EWMA) the moving averages
+    are used where the node has them, so one-off spikes do not flip the
+    ranking.
     """
-    cpu_usage = node_data.get("cpu_usage_percent", 100)
-    memory_usage = node_data.get("memory_usage_percent", 100)
+    if smoothed is None:
+        smoothed = Config.SCORE_USE_EWMA
+    cpu_usage = _usage(node_data, "cpu_usage_percent", smoothed)
+    memory_usage = _usage(node_data, "memory_usage_percent", smoothed)
 
     # Weighted score calculation
     score = (cpu_usage * Config.CPU_WEIGHT) + (memory_usage * Config.MEMORY_WEIGHT)
@@ -17,4 +38,11 @@ def calculate_node_score(node_data: dict) -> float:
     elif cpu_usage > 80 or memory_usage > 80:
         score += Config.MEDIUM_PENALTY  # Medium penalty for heavily used nodes
 
-    return round(score, 2)
\ No newline at end of file
+    return round(score, 2)
+
+def node_load_score(node_data: dict) -> Optional[float]:
+    """calculate_node_score, or None for a node without current usage
+    figures (its Redis state expired); such nodes are never available"""
+    if node_data.get("cpu_usage_percent") is None or node_data.get("memory_usage_percent") is None:
+        return None
+    return calculate_node_score(node_data)
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production serving:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker builds its own app and background threads (preload_app is off
+so no thread or Redis/Postgres connection crosses a fork). Periodic tasks
+start in every worker and claim each run through Redis, so they execute
+once per interval cluster-wide.
+"""
+from app import create_app, run_periodic_tasks
+
+app = create_app()
+run_periodic_tasks(app)